@@ -0,0 +1,55 @@
+"""
+    对比两种棋盘引擎的速度（每秒展开的节点数）
+    用法：python -m benchmarks.engine_search [空位数]
+    Smart_Cirno在自己的SearchBoard上搜索 不经过棋盘引擎 所以这里不用它
+    而是直接用GameState的is_over legal_moves apply_move把整棵博弈树走一遍 两种引擎走的是完全相同的树
+"""
+
+import sys
+import time
+
+from dlgo import goboard_fast
+from dlgo import goboard_slow
+from dlgo.gotypes import Point
+
+
+# 开局的几手 让博弈树大小适中
+OPENING = [Point(row=2, col=2), Point(row=1, col=1), Point(row=1, col=3)]
+
+
+# 从game_state出发的博弈树的节点数 只下落子（不停一手不认输）
+def count_nodes(game_state):
+    nodes = 1
+    if game_state.is_over():
+        return nodes
+    for move in game_state.legal_moves():
+        if move.is_play:
+            nodes += count_nodes(game_state.apply_move(move))
+    return nodes
+
+
+def run(engine, num_empty):
+    game = engine.GameState.new_game(3)
+    for point in OPENING[:9 - num_empty]:
+        game = game.apply_move(engine.Move.play(point))
+
+    start = time.perf_counter()
+    nodes = count_nodes(game)
+    return nodes, time.perf_counter() - start
+
+
+def main():
+    num_empty = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    # 空位更少时开局不够用 会悄悄变成从有6个空位的局面开始
+    if not 9 - len(OPENING) <= num_empty <= 9:
+        sys.exit('number of empty points must be between %d and 9' % (9 - len(OPENING)))
+    results = {}
+    for name, engine in (('goboard_slow', goboard_slow), ('goboard_fast', goboard_fast)):
+        nodes, elapsed = run(engine, num_empty)
+        results[name] = nodes / elapsed
+        print('%-13s nodes: %8d  time: %7.3fs  nodes/sec: %10.0f' % (name, nodes, elapsed, nodes / elapsed))
+    print('speedup: %.2fx' % (results['goboard_fast'] / results['goboard_slow']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+    命令行的启动时间
+    在新的解释器里运行python -m dlgo best-move 测从启动到打出结果的墙钟时间 取几次中最快的一次
+    同时列出这次运行导入了哪些重量级的模块（应该一个都没有）
+    用法：python -m benchmarks.startup [次数]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+# 一次性的查询用不到的模块
+HEAVY_MODULES = ('numpy', 'pygame', 'six', 'asyncio', 'sqlite3', 'multiprocessing')
+
+COMMAND = ['-m', 'dlgo', 'best-move', '--moves', 'B2']
+
+_REPORT = '''
+import runpy, sys
+sys.argv = ['dlgo'] + sys.argv[1:]
+try:
+    runpy.run_module('dlgo', run_name='__main__')
+except SystemExit:
+    pass
+print(sorted(name for name in %r if name in sys.modules), file=sys.stderr)
+''' % (HEAVY_MODULES,)
+
+
+def _env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [root, env.get('PYTHONPATH')]))
+    return env
+
+
+# 启动到退出的时间（秒） 取repeat次中最快的一次
+def startup_time(repeat=5):
+    env = _env()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + COMMAND, env=env, check=True, stdout=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# 运行一次命令时导入了的重量级模块
+def heavy_imports():
+    result = subprocess.run([sys.executable, '-c', _REPORT] + COMMAND[2:], env=_env(), check=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    return json.loads(result.stderr.strip().splitlines()[-1].replace("'", '"'))
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print('best-move startup: %.3fs' % startup_time(repeat))
+    print('heavy modules imported: %s' % (', '.join(heavy_imports()) or 'none'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+    引擎和机器人的基准测试
+    微基准：apply_move is_valid_move legal_moves is_over evaluate_win Smart_Cirno.select_move 在开局 中盘 残局的单次耗时
+    宏基准：RandomBot对Smart_Cirno整盘对局的吞吐量
+    内存：一盘棋的previous_state链和紧凑棋谱的内存峰值
+    启动：python -m dlgo best-move从启动到退出的时间
+    结果以JSON输出 可以和保存下来的基线比较 有退步时以非零状态退出
+    用法：
+        python -m benchmarks.suite --output baseline.json
+        python -m benchmarks.suite --compare baseline.json [--threshold 0.2]
+    --quick的循环短 噪声大 比较时默认的threshold放宽到QUICK_THRESHOLD 只用来发现成倍的退步
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from benchmarks.startup import startup_time
+from dlgo.agent.naive import RandomBot
+from dlgo.agent.smart_cirno import Smart_Cirno
+from dlgo.gotypes import Point
+from dlgo.scoring import evaluate_win
+from dlgo.selfplay import play_games
+
+ENGINES = ('goboard_slow', 'goboard_fast')
+
+# 比较时允许的变差比例 --quick时每项只测几毫秒 机器忙闲的起伏（几秒内差四成以上）整个落在测量里
+THRESHOLD = 0.2
+QUICK_THRESHOLD = 1.0
+QUICK_PASSES = 5
+
+# 各个阶段的局面由同一串落子得到 开局是空棋盘
+OPENING_MOVES = [Point(2, 2), Point(1, 1), Point(1, 3), Point(3, 1), Point(2, 1), Point(2, 3), Point(3, 2)]
+PHASES = {
+    'opening': 0,
+    'middle': 4,
+    'endgame': 7,
+}
+
+
+# 测一个函数的单次耗时 自动决定循环次数 取几轮中最快的一轮
+def time_call(func, min_time=0.05, repeat=3):
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, int(min_time / elapsed) + 1)
+
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+def phase_state(goboard, phase):
+    game = goboard.GameState.new_game(3)
+    for point in OPENING_MOVES[:PHASES[phase]]:
+        game = game.apply_move(goboard.Move.play(point))
+    return game
+
+
+def metric(value, unit, better='lower'):
+    return {'value': value, 'unit': unit, 'better': better}
+
+
+def micro_benchmarks(min_time):
+    metrics = {}
+    for engine in ENGINES:
+        goboard = importlib.import_module('dlgo.' + engine)
+        for phase in PHASES:
+            game = phase_state(goboard, phase)
+            empty = next(Point(r, c) for r in range(1, 4) for c in range(1, 4) if game.board.get(Point(r, c)) is None)
+            move = goboard.Move.play(empty)
+            prefix = '%s.%s.' % (engine, phase)
+
+            metrics[prefix + 'apply_move'] = metric(time_call(lambda: game.apply_move(move), min_time), 's')
+            metrics[prefix + 'is_valid_move'] = metric(time_call(lambda: game.is_valid_move(move), min_time), 's')
+            metrics[prefix + 'legal_moves'] = metric(time_call(game.legal_moves, min_time), 's')
+            metrics[prefix + 'is_over'] = metric(time_call(game.is_over, min_time), 's')
+            metrics[prefix + 'evaluate_win'] = metric(time_call(lambda: evaluate_win(game.board), min_time), 's')
+            # 每次都用新的机器人 测的是没有置换表缓存时的耗时
+            metrics[prefix + 'select_move'] = metric(
+                time_call(lambda: Smart_Cirno().select_move(game), min_time, repeat=1), 's')
+    return metrics
+
+
+def macro_benchmarks(num_games):
+    metrics = {}
+    for engine in ENGINES:
+        start = time.perf_counter()
+        # 机器人跨对局保留置换表 测的是持续自对弈的吞吐量
+        games = sum(1 for _ in play_games(RandomBot(), Smart_Cirno(), num_games, processes=1, engine=engine,
+                                          fresh_agents=False))
+        elapsed = time.perf_counter() - start
+        metrics['%s.random_vs_cirno.games_per_sec' % engine] = metric(games / elapsed, 'games/s', 'higher')
+    return metrics
+
+
+# 在大棋盘上随机下完一盘 测previous_state链和紧凑棋谱的内存峰值
+def memory_benchmarks(board_size=15):
+    metrics = {}
+    for engine in ENGINES:
+        goboard = importlib.import_module('dlgo.' + engine)
+        random.seed(0)
+        points = [Point(r, c) for r in range(1, board_size + 1) for c in range(1, board_size + 1)]
+        random.shuffle(points)
+
+        for name, compact in (('history', False), ('compact_history', True)):
+            tracemalloc.start()
+            game = goboard.GameState.new_game(board_size, win_length=board_size, compact_history=compact)
+            for point in points:
+                game = game.apply_move(goboard.Move.play(point))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            metrics['%s.%s_%dx%d.peak_bytes' % (engine, name, board_size, board_size)] = metric(peak, 'bytes')
+            del game
+    return metrics
+
+
+def run(quick=False):
+    metrics = {}
+    if quick:
+        # 快速模式每轮很短 同一项的几轮紧挨着测 一起碰上机器忙的时候就一起变慢
+        # 所以把整套微基准测QUICK_PASSES遍 每项取各遍中最快的
+        for _ in range(QUICK_PASSES):
+            for name, value in micro_benchmarks(0.01).items():
+                if name not in metrics or value['value'] < metrics[name]['value']:
+                    metrics[name] = value
+    else:
+        metrics.update(micro_benchmarks(0.05))
+    metrics.update(macro_benchmarks(20 if quick else 200))
+    metrics.update(memory_benchmarks())
+    metrics['startup.best_move.seconds'] = metric(startup_time(2 if quick else 5), 's')
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'metrics': metrics,
+    }
+
+
+# 和基线比较 变差超过threshold（比例）的指标算作退步 越大越好的指标变成原来的1/(1+threshold)以下算退步
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, current in sorted(results['metrics'].items()):
+        old = baseline['metrics'].get(name)
+        if old is None or not old['value']:
+            continue
+        ratio = current['value'] / old['value']
+        if current['better'] == 'lower':
+            worse = ratio > 1 + threshold
+        else:
+            worse = ratio < 1 / (1 + threshold)
+        if worse:
+            regressions.append((name, old['value'], current['value'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='engine and agent benchmarks')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float,
+                        help='allowed relative slowdown (default %g, %g with --quick)' % (THRESHOLD, QUICK_THRESHOLD))
+    parser.add_argument('--quick', action='store_true', help='shorter timing loops and fewer games')
+    args = parser.parse_args(argv)
+
+    results = run(args.quick)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        threshold = args.threshold
+        if threshold is None:
+            threshold = QUICK_THRESHOLD if args.quick else THRESHOLD
+        regressions = compare(results, baseline, threshold)
+        for name, old, new, ratio in regressions:
+            print('REGRESSION %s: %.6g -> %.6g (x%.2f)' % (name, old, new, ratio), file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+    命令行入口
+        python -m dlgo play [--black human] [--white cirno] [--frontend terminal|pygame|none]
+        python -m dlgo selfplay [--games 1000] [--processes N] [--black random] [--white cirno] [--record games.dlgr]
+        python -m dlgo best-move [--moves B2,A1] [--bot cirno]
+        python -m dlgo show-games games.dlgr [--limit 10]
+    共同的参数：--size 棋盘大小 --win-length 几子连线算赢 --engine goboard_slow|goboard_fast
+    只在用到时才导入机器人 pygame numpy等 一次性的查询启动得快
+"""
+
+import argparse
+import sys
+
+from dlgo.agent.registry import BOTS
+from dlgo.agent.registry import EXHAUSTIVE_BOTS
+from dlgo.agent.registry import MAX_EXHAUSTIVE_POINTS
+
+
+def _new_game(args):
+    import importlib
+    goboard = importlib.import_module('dlgo.' + args.engine)
+    return goboard.GameState.new_game(args.size, win_length=args.win_length)
+
+
+def _player(name):
+    if name == 'human':
+        return None
+    from dlgo.agent.registry import make_bot
+    return make_bot(name)
+
+
+def play(args):
+    from dlgo.game_loop import NullFrontend, TerminalFrontend, run_game
+    from dlgo.gotypes import Player
+
+    if args.frontend == 'pygame':
+        from exhibitor import PygameFrontend
+        frontend = PygameFrontend(args.size, 50)
+    elif args.frontend == 'terminal':
+        frontend = TerminalFrontend()
+    else:
+        frontend = NullFrontend()
+
+    players = {Player.black: _player(args.black), Player.white: _player(args.white)}
+    game = run_game(_new_game(args), players, frontend)
+    print(game.winner(), "win this game")
+    return 0
+
+
+def selfplay(args):
+    from dlgo.agent.registry import make_bot
+    from dlgo.selfplay import SelfPlayStats, play_games
+
+    writer = None
+    if args.record:
+        from dlgo.game_file import GameWriter
+        writer = GameWriter(args.record)
+    stats = SelfPlayStats()
+    try:
+        for record in play_games(make_bot(args.black), make_bot(args.white), args.games, processes=args.processes,
+                                 board_size=args.size, engine=args.engine, win_length=args.win_length,
+                                 base_seed=args.seed, record_moves=writer is not None):
+            stats.add(record)
+            if writer is not None:
+                writer.write(record.game)
+    finally:
+        if writer is not None:
+            writer.close()
+    print(stats.summary())
+    return 0
+
+
+def best_move(args):
+    from dlgo.agent.helpers import selected_move
+    from dlgo.agent.registry import make_bot
+    from dlgo.game_loop import move_text, parse_move
+
+    game = _new_game(args)
+    for text in filter(None, args.moves.split(',')):
+        try:
+            move = parse_move(text)
+        except ValueError:
+            move = None
+        if move is None or move.is_play and not game.board.is_on_grid(move.point) or not game.is_valid_move(move):
+            print('illegal move: %s' % text, file=sys.stderr)
+            return 2
+        game = game.apply_move(move)
+
+    bot = make_bot(args.bot, instrument=args.verbose)
+    move = selected_move(bot.select_move(game))
+    print(move_text(move))
+    if args.verbose:
+        print(move_text(move), bot.diagnostics(), file=sys.stderr)
+    return 0
+
+
+def show_games(args):
+    import itertools
+    from dlgo.game_file import game_text, read_games
+
+    for game in itertools.islice(read_games(args.path), args.limit):
+        print(game_text(game))
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m dlgo')
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--size', type=int, default=3, help='board size (default 3)')
+    common.add_argument('--win-length', type=int, help='stones in a row to win (default: full line)')
+    common.add_argument('--engine', choices=('goboard_slow', 'goboard_fast'), default='goboard_fast')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    bots = sorted(BOTS)
+    command = commands.add_parser('play', parents=[common], help='play a game')
+    command.add_argument('--black', choices=bots + ['human'], default='cirno')
+    command.add_argument('--white', choices=bots + ['human'], default='human')
+    command.add_argument('--frontend', choices=('terminal', 'pygame', 'none'), default='terminal')
+    command.set_defaults(func=play)
+
+    command = commands.add_parser('selfplay', parents=[common], help='play many bot-vs-bot games')
+    command.add_argument('--games', type=int, default=100)
+    command.add_argument('--processes', type=int)
+    command.add_argument('--seed', type=int, default=0)
+    command.add_argument('--black', choices=bots, default='random')
+    command.add_argument('--white', choices=bots, default='cirno')
+    command.add_argument('--record', help='append the games to this game file')
+    command.set_defaults(func=selfplay)
+
+    command = commands.add_parser('best-move', parents=[common], help='print the bot move for a position')
+    command.add_argument('--moves', default='', help='comma separated moves from the empty board, e.g. B2,A1')
+    command.add_argument('--bot', choices=bots, default='cirno')
+    command.add_argument('-v', '--verbose', action='store_true', help='print diagnostics to stderr')
+    command.set_defaults(func=best_move)
+
+    command = commands.add_parser('show-games', help='print the games in a game file as text')
+    command.add_argument('path')
+    command.add_argument('--limit', type=int, help='print at most this many games')
+    command.set_defaults(func=show_games)
+
+    args = parser.parse_args(argv)
+    if args.command == 'play' and args.frontend == 'none' and 'human' in (args.black, args.white):
+        parser.error('--frontend none cannot take moves from a human player')
+    if getattr(args, 'size', 1) < 1:
+        parser.error('--size must be at least 1')
+    if getattr(args, 'win_length', None) is not None and not 1 <= args.win_length <= args.size:
+        parser.error('--win-length must be between 1 and --size')
+    for bot in (getattr(args, name, None) for name in ('black', 'white', 'bot')):
+        if bot in EXHAUSTIVE_BOTS and args.size * args.size > MAX_EXHAUSTIVE_POINTS:
+            parser.error('bot %r only supports boards up to %d points, use mcts or threat'
+                         % (bot, MAX_EXHAUSTIVE_POINTS))
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
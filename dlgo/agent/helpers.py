@@ -0,0 +1,10 @@
+__all__ = [
+    'selected_move',
+]
+
+
+# Smart_Cirno的select_move返回(move, 估计结果) 其他机器人只返回move 这里统一取出move
+def selected_move(result):
+    if isinstance(result, tuple):
+        return result[0]
+    return result
@@ -0,0 +1,191 @@
+"""
+    蒙特卡洛树搜索（MCTS）机器人
+    每次模拟：
+        选择 从根出发 按UCT公式往下走到一个还有没展开的点的节点
+        展开 在那里新建一个子节点
+        模拟 从子节点开始双方随机落子直到终局
+        回传 把结果加到路径上每个节点的统计里
+    模拟次数（playouts）或时间预算（time_limit）用完后 选访问次数最多的一手
+    搜索在SearchBoard上原地落子和悔棋 两种棋盘引擎的GameState都可以用
+    reuse_tree为True时保留上一次的树 下一次从实际下出的那一两手对应的子树继续搜
+"""
+
+import math
+import random
+import time
+
+from dlgo.agent.base import Agent
+from dlgo.goboard_slow import Move
+from dlgo.search_board import SearchBoard
+
+__all__ = ['MCTSAgent']
+
+
+# 树的节点 player是走到这个节点的那一手由谁下 wins是站在player的角度累计的得分（胜1 平0.5）
+class MCTSNode():
+    __slots__ = ('parent', 'point', 'player', 'children', 'untried', 'wins', 'visits')
+
+    def __init__(self, parent, point, player, untried):
+        self.parent = parent
+        self.point = point
+        self.player = player
+        self.children = {}
+        # 还没有展开的落子点 随机顺序
+        self.untried = untried
+        self.wins = 0.0
+        self.visits = 0
+
+
+class MCTSAgent(Agent):
+    # playouts和time_limit至少给一个 都给时先用完的一个为准
+    # temperature是UCT公式中探索项的系数
+    def __init__(self, playouts=1000, time_limit=None, temperature=1.4, reuse_tree=True):
+        super().__init__()
+        assert playouts is not None or time_limit is not None
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.temperature = temperature
+        self.reuse_tree = reuse_tree
+        self._root = None
+        self._root_cells = None
+        self._last = {}
+
+    def select_move(self, game_state):
+        if not game_state.legal_points():
+            return Move.pass_turn()
+        position = SearchBoard.from_game_state(game_state)
+        root, reused = self._reuse(game_state, position)
+
+        start = time.perf_counter()
+        deadline = None if self.time_limit is None else start + self.time_limit
+        # 至少模拟一次 保证根节点有子节点可选
+        playouts = 0
+        while True:
+            self._playout(root, position)
+            playouts += 1
+            if self.playouts is not None and playouts >= self.playouts:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+        best = max(root.children.values(), key=lambda child: child.visits)
+        self._root = root
+        self._root_cells = position.cells()
+        self._last = {
+            'playouts': playouts,
+            'reused_visits': reused,
+            'visits': root.visits,
+            'value': best.wins / best.visits,
+            'seconds': time.perf_counter() - start,
+        }
+        return Move.play(best.point)
+
+    # 找出上一次的树中对应当前局面的子树 找不到就新建一棵
+    # 返回（根节点, 沿用下来的访问次数）
+    def _reuse(self, game_state, position):
+        root = self._root
+        self._root = None
+        if self.reuse_tree and root is not None:
+            node = self._descend(root, game_state, position)
+            if node is not None:
+                node.parent = None
+                return node, node.visits
+        return self._new_node(None, None, position.next_player.other, position), 0
+
+    # 上一次搜索之后下了一手或两手时 沿着这些落子往下走 并核对棋盘确实一致
+    def _descend(self, root, game_state, position):
+        cells = position.cells()
+        old_cells = self._root_cells
+        if len(cells) != len(old_cells):
+            return None
+        added = sum(1 for old, new in zip(old_cells, cells) if old != new)
+        if added == 1:
+            moves = [game_state.last_move]
+        elif added == 2:
+            moves = [game_state.second_last_move, game_state.last_move]
+        else:
+            return None
+
+        expected = list(old_cells)
+        node = root
+        for move in moves:
+            if move is None or not move.is_play:
+                return None
+            node = node.children.get(move.point)
+            if node is None:
+                return None
+            expected[(move.point.row - 1) * position.num_cols + (move.point.col - 1)] = node.player.value
+        if tuple(expected) != cells or node.player != position.next_player.other:
+            return None
+        return node
+
+    @classmethod
+    def _new_node(cls, parent, point, player, position):
+        untried = position.legal_points()
+        random.shuffle(untried)
+        return MCTSNode(parent, point, player, untried)
+
+    # 一次模拟 结束时position恢复原样
+    def _playout(self, root, position):
+        node = root
+        depth = 0
+        # 选择
+        while not node.untried and node.children:
+            node = self._select_child(node)
+            position.play(node.point)
+            depth += 1
+        # 展开
+        if node.untried:
+            point = node.untried.pop()
+            player = position.next_player
+            position.play(point)
+            depth += 1
+            child = self._new_node(node, point, player, position)
+            node.children[point] = child
+            node = child
+        # 模拟
+        winner = self._rollout(position)
+        # 回传
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.wins += 0.5
+            elif winner == node.player:
+                node.wins += 1
+            node = node.parent
+        for _ in range(depth):
+            position.undo()
+
+    # UCT 胜率加上探索项 没访问过的子节点不会出现（展开时就模拟了一次）
+    def _select_child(self, node):
+        log_visits = math.log(node.visits)
+        temperature = self.temperature
+        best = None
+        best_score = -1.0
+        for child in node.children.values():
+            score = child.wins / child.visits + temperature * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best = child
+                best_score = score
+        return best
+
+    # 双方随机落子直到终局 返回赢家 平局为None 结束时position恢复原样
+    @classmethod
+    def _rollout(cls, position):
+        if position.winner is not None:
+            return position.winner
+        points = position.empty_points()
+        random.shuffle(points)
+        played = 0
+        for point in points:
+            position.play(point)
+            played += 1
+            if position.winner is not None:
+                break
+        winner = position.winner
+        for _ in range(played):
+            position.undo()
+        return winner
+
+    def diagnostics(self):
+        return dict(self._last)
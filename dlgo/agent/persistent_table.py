@@ -0,0 +1,202 @@
+"""
+    存在磁盘上的置换表
+    用SQLite保存已经解出的局面 下一次运行（或另一个进程）可以直接取用 不必重新推理
+    内存里依然有一张TranspositionTable作为前端缓存 查不到时再查数据库
+    写入先攒在内存里 由flush()批量提交 Smart_Cirno每下完一步调用一次
+    多个进程可以同时打开同一个文件：数据库用WAL模式 写入冲突时等待对方提交
+    warm_entries是打开时预先读进内存的最近用过的局面数 max_entries是数据库的容量 超出时删掉最久没用过的
+    namespace区分含义不同的表项（穷举的胜负和α-β的分数）它们可以存在同一个文件里
+    表项存成纯数据（JSON）而不是pickle 读别人写的文件不会执行任何代码
+    used是单调递增的序号 每次提交给用到的表项依次编号 淘汰时按序号从小到大 同一批内也有先后
+"""
+
+import json
+import sqlite3
+
+from dlgo.agent.transposition import EXACT
+from dlgo.agent.transposition import TableEntry
+from dlgo.agent.transposition import TranspositionTable
+from dlgo.goboard_slow import Move
+from dlgo.gotypes import Player
+from dlgo.gotypes import Point
+
+__all__ = [
+    'PersistentTable',
+    'encode_key',
+]
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, used INTEGER NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS entries_used ON entries (used)',
+)
+
+
+def _plain(value):
+    if isinstance(value, Player):
+        return value.value
+    if isinstance(value, (tuple, list)):
+        return tuple(_plain(item) for item in value)
+    if isinstance(value, (frozenset, set)):
+        return tuple(sorted(_plain(item) for item in value))
+    return value
+
+
+# 把置换表的键变成与进程无关的字符串 阵营换成它的值 集合按排序后的顺序
+# Smart_Cirno的键是（阵营, 整数元组...） 直接格式化 不必逐项转换
+def encode_key(key, namespace=''):
+    if type(key) is tuple and key and type(key[0]) is Player and all(type(part) is tuple for part in key[1:]):
+        return '%s%d%r' % (namespace, key[0].value, key[1:])
+    return namespace + repr(_plain(key))
+
+
+# 表项的值写成JSON：result中阵营写成名字 平局False 未知None 分数是数
+# move写成[行, 列] "pass" "resign"或None
+def encode_value(result, move, depth, flag):
+    if isinstance(result, Player):
+        result = result.name
+    if move is None:
+        code = None
+    elif move.is_pass:
+        code = 'pass'
+    elif move.is_resign:
+        code = 'resign'
+    else:
+        code = [move.point.row, move.point.col]
+    return json.dumps([result, code, depth, flag])
+
+
+def decode_value(value):
+    result, code, depth, flag = json.loads(value)
+    if isinstance(result, str):
+        result = Player[result]
+    if code is None:
+        move = None
+    elif code == 'pass':
+        move = Move.pass_turn()
+    elif code == 'resign':
+        move = Move.resign()
+    else:
+        move = Move.play(Point(*code))
+    return TableEntry(result, move, depth, flag)
+
+
+class PersistentTable(TranspositionTable):
+    # max_size是内存中前端缓存的容量 其余参数见模块说明 flush_every是攒够多少条写入时自动提交
+    def __init__(self, path, max_size=None, max_entries=None, warm_entries=10000, flush_every=10000, namespace=''):
+        super().__init__(max_size)
+        assert max_entries is None or max_entries > 0
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.warm_entries = warm_entries
+        self.flush_every = flush_every
+        # 从数据库中取到的次数
+        self.disk_hits = 0
+        self._open()
+
+    def _open(self):
+        self._db = sqlite3.connect(self.path, timeout=60)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        with self._db:
+            for statement in _SCHEMA:
+                self._db.execute(statement)
+        # 还没写进数据库的表项 编码后的键到值
+        self._dirty = {}
+        # 用到过的数据库中的局面 提交时更新它们的使用时间
+        self._touched = set()
+        if self.warm_entries:
+            self.warm_up(self.warm_entries)
+
+    # 把最近用过的limit个局面读进内存
+    def warm_up(self, limit):
+        rows = self._db.execute('SELECT key, value FROM entries WHERE key >= ? AND key < ? ORDER BY used DESC LIMIT ?',
+                                (self.namespace, self.namespace + '\uffff', limit))
+        for code, value in rows:
+            if code not in self._entries:
+                super().store(code, *decode_value(value))
+        return len(self._entries)
+
+    def get(self, key):
+        code = encode_key(key, self.namespace)
+        entry = super().get(code)
+        if entry is not None:
+            return entry
+        row = self._db.execute('SELECT value FROM entries WHERE key = ?', (code,)).fetchone()
+        if row is None:
+            return None
+        # 内存里没有 数据库里有 也算命中
+        self.misses -= 1
+        self.hits += 1
+        self.disk_hits += 1
+        entry = decode_value(row[0])
+        super().store(code, *entry)
+        self._touched.add(code)
+        return entry
+
+    def store(self, key, result, move, depth=None, flag=EXACT):
+        code = encode_key(key, self.namespace)
+        super().store(code, result, move, depth, flag)
+        self._dirty[code] = encode_value(result, move, depth, flag)
+        if len(self._dirty) >= self.flush_every:
+            self.flush()
+
+    # 提交攒下的写入 更新用到的局面的序号 超出容量时淘汰最久没用过的
+    # 先取得写锁再读最大的序号 别的进程不会在这中间插进来用同样的序号
+    def flush(self):
+        if not self._dirty and not self._touched:
+            return
+        with self._db:
+            self._db.execute('BEGIN IMMEDIATE')
+            used = self._db.execute('SELECT COALESCE(MAX(used), 0) FROM entries').fetchone()[0]
+            touched = [code for code in self._touched if code not in self._dirty]
+            self._db.executemany('UPDATE entries SET used = ? WHERE key = ?',
+                                 ((used + i + 1, code) for i, code in enumerate(touched)))
+            used += len(touched)
+            self._db.executemany('INSERT OR REPLACE INTO entries (key, value, used) VALUES (?, ?, ?)',
+                                 ((code, value, used + i + 1) for i, (code, value) in enumerate(self._dirty.items())))
+            if self.max_entries is not None:
+                count = self._db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+                if count > self.max_entries:
+                    self._db.execute('DELETE FROM entries WHERE key IN '
+                                     '(SELECT key FROM entries ORDER BY used LIMIT ?)', (count - self.max_entries,))
+                    self.evictions += count - self.max_entries
+        self._dirty.clear()
+        self._touched.clear()
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+    # 只清空内存中的缓存 数据库中的局面留着
+    def clear(self):
+        self.flush()
+        super().clear()
+
+    def stats(self):
+        stats = super().stats()
+        stats['disk_hits'] = self.disk_hits
+        stats['disk_size'] = self._db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        stats['pending_writes'] = len(self._dirty)
+        return stats
+
+    def __contains__(self, key):
+        code = encode_key(key, self.namespace)
+        if code in self._entries:
+            return True
+        return self._db.execute('SELECT 1 FROM entries WHERE key = ?', (code,)).fetchone() is not None
+
+    # 数据库连接不能被pickle 送到别的进程时先提交 在那边重新打开同一个文件
+    def __getstate__(self):
+        self.flush()
+        return {
+            'path': self.path,
+            'max_size': self.max_size,
+            'max_entries': self.max_entries,
+            'warm_entries': self.warm_entries,
+            'flush_every': self.flush_every,
+            'namespace': self.namespace,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
@@ -0,0 +1,53 @@
+"""
+    按名字生成机器人
+    各个机器人所在的模块在生成时才导入 只用到其中一个时不必加载其余的
+"""
+
+__all__ = [
+    'BOTS',
+    'EXHAUSTIVE_BOTS',
+    'MAX_EXHAUSTIVE_POINTS',
+    'make_bot',
+]
+
+# 穷举搜索的机器人 空棋盘上第一步：3x4约2秒 4x4约3分钟 更大的棋盘算不完
+EXHAUSTIVE_BOTS = ('cirno',)
+MAX_EXHAUSTIVE_POINTS = 12
+
+
+# 构造函数的instrument为True时收集搜索统计 放进diagnostics() 没有搜索统计的机器人忽略它
+def _cirno(instrument=False):
+    from dlgo.agent.smart_cirno import Smart_Cirno
+    return Smart_Cirno(instrument=instrument)
+
+
+def _random(instrument=False):
+    from dlgo.agent.naive import RandomBot
+    return RandomBot()
+
+
+def _mcts(instrument=False):
+    from dlgo.agent.mcts import MCTSAgent
+    return MCTSAgent(time_limit=1.0)
+
+
+def _threat(instrument=False):
+    from dlgo.agent.threat_space import ThreatSpaceAgent
+    return ThreatSpaceAgent(time_limit=1.0)
+
+
+# 名字到构造函数 构造函数必须能在子进程里调用
+BOTS = {
+    'cirno': _cirno,
+    'random': _random,
+    'mcts': _mcts,
+    'threat': _threat,
+}
+
+
+def make_bot(name, instrument=False):
+    try:
+        factory = BOTS[name]
+    except KeyError:
+        raise ValueError('unknown bot: %r' % (name,))
+    return factory(instrument=instrument)
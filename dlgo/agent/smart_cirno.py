@@ -3,121 +3,588 @@
     该函数读入一个状态 并根据状态返回一个认为最佳的move
 """
 
+import logging
 import random
+import time
 from dlgo.agent.base import Agent
+from dlgo.agent.transposition import EXACT, LOWER_BOUND, UPPER_BOUND
+from dlgo.agent.transposition import TranspositionTable
 from dlgo.goboard_slow import Move
-from dlgo.gotypes import Point
-from dlgo.scoring import evaluate_win
+from dlgo.scoring import line_table
+from dlgo.search_board import SearchBoard
+from dlgo.symmetry import canonical_form
+from dlgo.symmetry import inverse_transform
+from dlgo.symmetry import transform_point
+from dlgo.symmetry import unique_candidates
 from dlgo.gotypes import Player
 
 
+# α-β搜索中必胜局面的分数 启发式估值的绝对值总是小于它
+WIN_SCORE = 1000000
+
+logger = logging.getLogger(__name__)
+
+
+# 一次select_move的搜索统计 只在instrument=True时收集
+class SearchStats:
+    def __init__(self):
+        # 展开的节点数
+        self.nodes = 0
+        # 终局判定和启发式估值的次数
+        self.leaf_evaluations = 0
+        # 剪枝次数（穷举时找到必胜手提前返回 α-β截断 置换表截断）
+        self.cutoffs = 0
+        # 置换表命中次数
+        self.cache_hits = 0
+        # 搜到的最大深度和当前深度
+        self.max_depth = 0
+        self.ply = 0
+        self.wall_time = 0.0
+        # 所选落子的估计结果 α-β搜索另有分数
+        self.value = None
+        self.score = None
+        # 出现"there is a bug here"的次数
+        self.anomalies = 0
+
+    def visit(self):
+        self.nodes += 1
+        if self.ply + 1 > self.max_depth:
+            self.max_depth = self.ply + 1
+
+    # 加上并行搜索中一个子进程的计数
+    def merge(self, other):
+        self.nodes += other.nodes
+        self.leaf_evaluations += other.leaf_evaluations
+        self.cutoffs += other.cutoffs
+        self.cache_hits += other.cache_hits
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.anomalies += other.anomalies
+
+    def to_dict(self):
+        return {
+            'nodes': self.nodes,
+            'leaf_evaluations': self.leaf_evaluations,
+            'cutoffs': self.cutoffs,
+            'cache_hits': self.cache_hits,
+            'max_depth': self.max_depth,
+            'wall_time': self.wall_time,
+            'nodes_per_sec': self.nodes / self.wall_time if self.wall_time > 0 else 0.0,
+            'value': self.value,
+            'score': self.score,
+            'anomalies': self.anomalies,
+        }
+
+
 class Smart_Cirno(Agent):
     # 琪露诺的完美井字棋教室
+    # use_table决定是否使用置换表 table_size为置换表容量 None表示不限
+    # search为"exhaustive"时穷举到终局 为"alphabeta"时用带走法排序的α-β负极大值搜索
+    # max_depth是α-β搜索的最大深度 None表示一直搜到终局（3x3上依然保证不败）
+    # use_symmetry为True时 旋转镜像等价的局面共用置换表中的一项 等价的候选点只搜一个
+    # instrument为True时收集每次select_move的搜索统计 由diagnostics()返回 关闭时搜索中只多一次None判断
+    # workers大于1时穷举搜索把根节点的候选点分给这么多个子进程 结论与单进程相同
+    # table_path不为None时置换表存在这个SQLite文件里 跨运行 跨进程共用 disk_size是文件中最多保存的局面数
+    def __init__(self, use_table=True, table_size=None, search="exhaustive", max_depth=None,
+                 use_symmetry=True, instrument=False, workers=None, table_path=None, disk_size=None):
+        super().__init__()
+        assert search in ("exhaustive", "alphabeta")
+        if not use_table:
+            self.transposition_table = None
+        elif table_path is not None:
+            # 只有用到持久置换表时才导入sqlite3
+            from dlgo.agent.persistent_table import PersistentTable
+            self.transposition_table = PersistentTable(table_path, table_size, max_entries=disk_size,
+                                                       namespace=search + ':')
+        else:
+            self.transposition_table = TranspositionTable(table_size)
+        self.table_path = table_path
+        self.disk_size = disk_size
+        self.search = search
+        self.max_depth = max_depth
+        self.use_symmetry = use_symmetry
+        self.instrument = instrument
+        self.workers = workers
+        # 正在进行的搜索的统计 不收集时为None
+        self._stats = None
+        # 上一次select_move的统计
+        self.last_stats = None
+        # 并行搜索的进程池和通知子进程停止的事件 第一次用到时才创建
+        self._pool = None
+        self._stop_event = None
+        # 返回True时放弃当前搜索 只在并行搜索的子进程里设置
+        self._should_stop = None
+
     def select_move(self, game_state):
+        table = self.transposition_table
+        if not self.instrument:
+            try:
+                return self.search_move(game_state)
+            finally:
+                if table is not None:
+                    table.flush()
+
+        stats = SearchStats()
+        hits = table.hits if table is not None else 0
+        self._stats = stats
+        start = time.perf_counter()
+        try:
+            action, estimation = self.search_move(game_state)
+        finally:
+            self._stats = None
+            if table is not None:
+                table.flush()
+        stats.wall_time = time.perf_counter() - start
+        # 并行搜索时已经加上了子进程置换表的命中次数
+        stats.cache_hits += table.hits - hits if table is not None else 0
+        stats.value = estimation_name(estimation)
+        self.last_stats = stats
+        return action, estimation
+
+    def search_move(self, game_state):
         candidates = self.find_candidate_action(game_state)
         # 若不存在一个合法的落子点 即候选数组为空
         if not candidates:
             # 返回pass
             return Move.pass_turn(), None
 
-        action, estimation = self.thinking_action(game_state, game_state.next_player, None)
+        # 搜索在可变的搜索棋盘上原地落子和悔棋 不为每个节点生成GameState
+        position = SearchBoard.from_game_state(game_state)
+        if self.search == "alphabeta":
+            return self.alphabeta_action(position)
+
+        if self.workers is not None and self.workers > 1:
+            import multiprocessing
+            if not multiprocessing.current_process().daemon:
+                return self.parallel_action(position)
+
+        action, estimation = self.thinking_action(position, position.next_player, None)
         return action, estimation
 
     # 若存在一个合法的落子点 则开始琪露诺的完美井字棋推理
     # return Move.play(random.choice(candidates))
+    # 棋盘增量维护着空点 只需判断一次是否终局
+    # game_state可以是GameState 也可以是SearchBoard
     @classmethod
     def find_candidate_action(cls, game_state):
-        # 候选者落子点数组
-        candidates = []
-        # 遍历棋盘的每一个点 找到所有合法落子点
-        for r in range(1, game_state.board.num_rows + 1):
-            for c in range(1, game_state.board.num_cols + 1):
-                # 该点的point数据结构
-                candidate = Point(row=r, col=c)
-                # 判断该落子点对于该阵营是否合法
-                if game_state.is_valid_move(Move.play(candidate)):
-                    # 若合法 则加入到数组中
-                    candidates.append(candidate)
-        return candidates
+        return game_state.legal_points()
+
+    # 需要展开的候选点 对称等价的只保留一个
+    def search_candidates(self, position, candidates):
+        if not self.use_symmetry:
+            return candidates
+        return unique_candidates(position, candidates)
 
     @classmethod
     def action_consequence(cls, game_state, move):
         return game_state.apply_move(move)
 
-    def thinking_action(self, game_state, faction, mother_estimation):
+    # 置换表的键 返回（键, 把棋盘变成标准形的变换） 不用对称时变换为None
+    # 键里带上棋盘大小和规则 不同棋盘的局面不会混在一起（持久化的置换表会被不同的对局共用）
+    def table_key(self, position):
+        rules = (position.num_rows, position.num_cols, position.win_length)
+        if not self.use_symmetry:
+            return (position.next_player, rules, position.position_key()), None
+        cells, transform = canonical_form(position)
+        return (position.next_player, rules, cells), transform
+
+    # 按变换映射落子 存表时映射到标准形的朝向 取表时用逆变换映射回来
+    @classmethod
+    def orient_move(cls, move, transform, board):
+        if transform is None or move is None or not move.is_play:
+            return move
+        return Move.play(transform_point(move.point, transform, board.num_rows, board.num_cols))
+
+    # 先查置换表 查不到再推理 并把确切结果记下来
+    def thinking_action(self, position, faction, mother_estimation):
+        table = self.transposition_table
+        if table is None:
+            return self.solve_action(position, faction, mother_estimation)
+
+        key, transform = self.table_key(position)
+        entry = table.get(key)
+        if entry is not None:
+            inverse = None if transform is None else inverse_transform(transform)
+            return self.orient_move(entry.move, inverse, position), entry.result
+
+        solution = self.solve_action(position, faction, mother_estimation)
+        if solution is not None:
+            move, result = solution
+            table.store(key, result, self.orient_move(move, transform, position))
+        return solution
+
+    # 穷举推理 在position上落子 推理 再悔棋 返回前position总是恢复原样
+    def solve_action(self, position, faction, mother_estimation):
         now_estimation = None
 
-        candidates = self.find_candidate_action(game_state)
-        if len(candidates) == 0:
-            candidates = self.find_candidate_action(game_state)
+        candidates = self.find_candidate_action(position)
 
-        win_actions = []
         tie_actions = []
         lose_actions = []
+        stats = self._stats
+        if self._should_stop is not None and self._should_stop():
+            raise SearchCancelled()
 
-        for point in candidates:
+        for point in self.search_candidates(position, candidates):
 
             move = Move.play(point)
-            new_state = self.action_consequence(game_state, move)
-            winner = evaluate_win(new_state.board)
+            position.play(point)
+            if stats is not None:
+                stats.visit()
+            winner = position.winner
             # 未完成的情况
             if winner is None and len(candidates) - 1 > 0:
-                action, winner = self.thinking_action(new_state, change_faction(faction), now_estimation)
-
-                """
-                    α-β剪枝
-                """
-                # if now_estimation is None:
-                #     now_estimation = winner
-                # else:
-                #     if judge_estimation_better(now_estimation, winner, faction):
-                #         now_estimation = winner
-                #
-                # if mother_estimation is not None:
-                #     # 母亲节点是否比本节点更【好】（对母亲节点而言的好）
-                #     # 如果不比母亲节点更好 相等乃至更烂 则不再继续
-                #     if not judge_estimation_better(mother_estimation, now_estimation, change_faction(faction)):
-                #         return move, faction
-                """
-                    α-β剪枝
-                """
+                if stats is not None:
+                    stats.ply += 1
+                action, winner = self.thinking_action(position, change_faction(faction), now_estimation)
+                if stats is not None:
+                    stats.ply -= 1
+                position.undo()
 
                 if winner == faction:
+                    if stats is not None:
+                        stats.cutoffs += 1
                     return move, winner
                 elif winner == change_faction(faction):
                     lose_actions.append(move)
                 elif winner is False:
                     tie_actions.append(move)
                 elif winner is None:
-                    print("warning: there is a bug here. code:001")
+                    self.report_bug("001")
                 else:
-                    print("warning: there is a bug here. code:003")
+                    self.report_bug("003")
             # 平局的情况
             elif winner is None and len(candidates) - 1 == 0:
+                position.undo()
+                if stats is not None:
+                    stats.leaf_evaluations += 1
                 tie_actions.append(move)
             # 胜负的情况
             else:
+                position.undo()
+                if stats is not None:
+                    stats.leaf_evaluations += 1
                 if winner == faction:
-                    # print("必胜手")
+                    if stats is not None:
+                        stats.cutoffs += 1
                     return move, winner
                 elif winner == change_faction(faction):
                     lose_actions.append(move)
                 elif winner is False:
                     tie_actions.append(move)
                 else:
-                    print("warning: there is a bug here. code:002")
-        if len(candidates) == 9:
-            print(win_actions, tie_actions, lose_actions, sep="\n")
-        if win_actions:
-            return random.choice(win_actions), faction
-        elif tie_actions:
+                    self.report_bug("002")
+        if tie_actions:
 
             return random.choice(tie_actions), False
         elif lose_actions:
 
             return random.choice(lose_actions), change_faction(faction)
         else:
-            print("warning: there is a bug here. code:006")
+            self.report_bug("006")
+
+    # 并行穷举：根节点的每个候选点是一棵独立的子树 分给进程池中的子进程各自推理
+    # 子进程各有一张跨步保留的置换表 有一个候选点必胜时通知其余子进程放弃 合并规则与solve_action相同
+    # 收集统计时 子进程把各自子树的计数送回来 加到这一步的统计里
+    def parallel_action(self, position):
+        table = self.transposition_table
+        key = transform = None
+        if table is not None:
+            key, transform = self.table_key(position)
+            entry = table.get(key)
+            if entry is not None:
+                inverse = None if transform is None else inverse_transform(transform)
+                return self.orient_move(entry.move, inverse, position), entry.result
+
+        faction = position.next_player
+        candidates = self.find_candidate_action(position)
+        win_actions = []
+        tie_actions = []
+        lose_actions = []
+        tasks = []
+        stats = self._stats
+        for point in self.search_candidates(position, candidates):
+            position.play(point)
+            if stats is not None:
+                stats.visit()
+            winner = position.winner
+            position.undo()
+            if winner is not None or len(candidates) - 1 == 0:
+                if stats is not None:
+                    stats.leaf_evaluations += 1
+            if winner == faction:
+                if stats is not None:
+                    stats.cutoffs += 1
+                win_actions.append(Move.play(point))
+                break
+            elif winner is None and len(candidates) - 1 == 0:
+                tie_actions.append(Move.play(point))
+            else:
+                tasks.append((position, point, stats is not None))
+
+        if not win_actions and tasks:
+            pool = self._search_pool()
+            self._stop_event.clear()
+            results = pool.imap_unordered(_search_root_move, tasks)
+            for point, winner, worker_stats in results:
+                if worker_stats is not None:
+                    stats.merge(worker_stats)
+                if winner == faction:
+                    win_actions.append(Move.play(point))
+                    # 剩下的子树不必再搜 等它们放弃后再返回 以免拖慢下一步
+                    self._stop_event.set()
+                    for _ in results:
+                        pass
+                    break
+                elif winner == change_faction(faction):
+                    lose_actions.append(Move.play(point))
+                elif winner is False:
+                    tie_actions.append(Move.play(point))
+                else:
+                    self.report_bug("007")
+
+        if win_actions:
+            solution = win_actions[0], faction
+        elif tie_actions:
+            solution = random.choice(tie_actions), False
+        elif lose_actions:
+            solution = random.choice(lose_actions), change_faction(faction)
+        else:
+            self.report_bug("006")
+            return None
+        if table is not None:
+            table.store(key, solution[1], self.orient_move(solution[0], transform, position))
+        return solution
+
+    def _search_pool(self):
+        if self._pool is None:
+            import multiprocessing
+            self._stop_event = multiprocessing.Event()
+            config = {
+                'use_table': self.transposition_table is not None,
+                'table_size': None if self.transposition_table is None else self.transposition_table.max_size,
+                'use_symmetry': self.use_symmetry,
+                'table_path': self.table_path,
+                'disk_size': self.disk_size,
+            }
+            self._pool = multiprocessing.Pool(self.workers, initializer=_init_search_worker,
+                                              initargs=(config, self._stop_event))
+        return self._pool
+
+    # 关闭并行搜索的进程池 把置换表写到持久存储
+    def close(self):
+        if self.transposition_table is not None:
+            self.transposition_table.flush()
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+            self._stop_event = None
+
+    # 进程池不能被pickle 送到别的进程时不带上 需要时重新创建
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        state['_stop_event'] = None
+        return state
+
+    # 搜索中出现了不该出现的情况 记日志并计数
+    def report_bug(self, code):
+        logger.warning("there is a bug here. code:%s", code)
+        if self._stats is not None:
+            self._stats.anomalies += 1
+
+    # α-β搜索 迭代加深：先浅后深 每一层都把上一层的最佳一手放在最前面
+    # 返回值与thinking_action相同：(move, 估计结果) 估计结果在深度不足以下结论时为None
+    def alphabeta_action(self, position):
+        faction = position.next_player
+        empties = len(self.find_candidate_action(position))
+        max_depth = empties if self.max_depth is None else min(self.max_depth, empties)
+
+        best_move = None
+        score = 0
+        for depth in range(1, max_depth + 1):
+            score, best_move = self.negamax(position, depth, -WIN_SCORE, WIN_SCORE, best_move)
+            # 已经分出胜负 更深的搜索不会改变结论
+            if abs(score) >= WIN_SCORE:
+                break
+
+        if self._stats is not None:
+            self._stats.score = score
+        if score >= WIN_SCORE:
+            estimation = faction
+        elif score <= -WIN_SCORE:
+            estimation = change_faction(faction)
+        elif max_depth == empties:
+            estimation = False
+        else:
+            estimation = None
+        return best_move, estimation
+
+    # 负极大值形式的α-β搜索 分数总是站在轮到的一方的角度 返回(分数, 最佳move)
+    # 与穷举推理一样在position上原地落子和悔棋
+    def negamax(self, position, depth, alpha, beta, first_move=None):
+        faction = position.next_player
+        stats = self._stats
+        candidates = self.find_candidate_action(position)
+        # 棋盘已满 平局
+        if not candidates:
+            if stats is not None:
+                stats.leaf_evaluations += 1
+            return 0, None
+        if depth == 0:
+            if stats is not None:
+                stats.leaf_evaluations += 1
+            return self.heuristic_estimation(position, faction), None
+
+        table = self.transposition_table
+        alpha_origin = alpha
+        if table is not None:
+            key, transform = self.table_key(position)
+            entry = table.get(key)
+            if entry is not None:
+                inverse = None if transform is None else inverse_transform(transform)
+                entry_move = self.orient_move(entry.move, inverse, position)
+                if first_move is None:
+                    first_move = entry_move
+                if entry.depth >= depth:
+                    if entry.flag == EXACT:
+                        return entry.result, entry_move
+                    elif entry.flag == LOWER_BOUND:
+                        alpha = max(alpha, entry.result)
+                    elif entry.flag == UPPER_BOUND:
+                        beta = min(beta, entry.result)
+                    if alpha >= beta:
+                        if stats is not None:
+                            stats.cutoffs += 1
+                        return entry.result, entry_move
+
+        best_score = -WIN_SCORE - 1
+        best_point = None
+        candidates = self.search_candidates(position, candidates)
+        for point in self.order_candidates(position, candidates, first_move):
+            position.play(point)
+            if stats is not None:
+                stats.visit()
+            if position.winner == faction:
+                if stats is not None:
+                    stats.leaf_evaluations += 1
+                score = WIN_SCORE
+            else:
+                if stats is not None:
+                    stats.ply += 1
+                score = -self.negamax(position, depth - 1, -beta, -alpha)[0]
+                if stats is not None:
+                    stats.ply -= 1
+            position.undo()
+
+            if score > best_score:
+                best_score = score
+                best_point = point
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.cutoffs += 1
+                break
+
+        best_move = Move.play(best_point)
+        if table is not None:
+            if best_score <= alpha_origin:
+                flag = UPPER_BOUND
+            elif best_score >= beta:
+                flag = LOWER_BOUND
+            else:
+                flag = EXACT
+            table.store(key, best_score, self.orient_move(best_move, transform, position), depth, flag)
+        return best_score, best_move
+
+    # 走法排序：上一轮的最佳一手 能直接赢的 能堵住对方的 然后按经过该点的连线数（中心 角 边）
+    @classmethod
+    def order_candidates(cls, position, candidates, first_move=None):
+        faction = position.next_player
+        table = line_table(position.num_rows, position.num_cols, position.win_length)
+        lengths = [len(line) for line in table.lines]
+        own_counts = position.line_counts(faction)
+        other_counts = position.line_counts(change_faction(faction))
+
+        # 在point落子能否连成线：经过它的某条连线上已有该方长度减一个子
+        def completes_line(counts, point):
+            for index in table.point_lines.get(point, ()):
+                if counts[index] == lengths[index] - 1:
+                    return True
+            return False
+
+        def priority(point):
+            if first_move is not None and first_move.point == point:
+                return 0, 0
+            if completes_line(own_counts, point):
+                return 1, 0
+            if completes_line(other_counts, point):
+                return 2, 0
+            return 3, -len(table.point_lines.get(point, ()))
+
+        return sorted(candidates, key=priority)
+
+    # 启发式估值：只有一方棋子的连线越满越好 双方都有子的连线已经没用了
+    @classmethod
+    def heuristic_estimation(cls, position, faction):
+        estimation = 0
+        for mine, theirs in zip(position.line_counts(faction), position.line_counts(change_faction(faction))):
+            if mine and not theirs:
+                estimation += 10 ** mine
+            elif theirs and not mine:
+                estimation -= 10 ** theirs
+        return max(-WIN_SCORE + 1, min(WIN_SCORE - 1, estimation))
+
+    def diagnostics(self):
+        diagnostics = {}
+        if self.last_stats is not None:
+            diagnostics.update(self.last_stats.to_dict())
+        if self.transposition_table is not None:
+            diagnostics['transposition_table'] = self.transposition_table.stats()
+        return diagnostics
+
+
+# 并行搜索中被通知放弃
+class SearchCancelled(Exception):
+    pass
+
+
+# 并行搜索子进程里的机器人 由进程池的initializer创建 每个子进程一个 置换表在各步之间保留
+_worker_agent = None
+
+
+def _init_search_worker(config, stop_event):
+    global _worker_agent
+    _worker_agent = Smart_Cirno(**config)
+    _worker_agent._should_stop = stop_event.is_set
+
+
+# 在子进程里推理根节点的一个候选点 返回（候选点, 结果, 统计） 被放弃时结果为None
+# instrument为True时统计这棵子树的SearchStats（深度从根节点的下一层算起） 否则统计为None
+# 每个候选点推理完就把置换表写到持久存储 进程池关闭时直接结束子进程 不会再有机会写
+def _search_root_move(task):
+    position, point, instrument = task
+    agent = _worker_agent
+    table = agent.transposition_table
+    stats = None
+    if instrument:
+        stats = SearchStats()
+        stats.ply = 1
+        hits = table.hits if table is not None else 0
+    agent._stats = stats
+    faction = position.next_player
+    position.play(point)
+    try:
+        _, winner = agent.thinking_action(position, change_faction(faction), None)
+    except SearchCancelled:
+        winner = None
+    finally:
+        agent._stats = None
+        if table is not None:
+            table.flush()
+    if stats is not None and table is not None:
+        stats.cache_hits = table.hits - hits
+    return point, winner, stats
 
 
 def change_faction(faction):
@@ -127,21 +594,10 @@ def change_faction(faction):
         return Player.white
 
 
-def judge_estimation_better(now_estimation, winner, faction):
-    if now_estimation is None:
-        return False
-
-    def get_mark(now_faction, self_faction):
-        if now_faction == self_faction:
-            return 1
-        elif now_faction == change_faction(self_faction):
-            return -1
-        elif now_faction is False:
-            return 0
-        else:
-            print("warning: there is a bug here. code:005")
-
-    now_mark = get_mark(now_estimation, faction)
-    new_mark = get_mark(winner, faction)
-
-    return new_mark > now_mark
+# 估计结果的名字 便于写进日志和JSON
+def estimation_name(estimation):
+    if estimation is False:
+        return "draw"
+    if estimation is None:
+        return None
+    return estimation.name
@@ -0,0 +1,87 @@
+"""
+    查残局库落子的机器人
+    残局库文件由dlgo.tablebase离线生成 这里用mmap只读打开
+    多个进程打开同一个文件时共用操作系统的同一份页缓存 不会各自读进一份
+"""
+
+import mmap
+import random
+
+from dlgo.agent.base import Agent
+from dlgo.goboard_slow import Move
+from dlgo.gotypes import Player
+from dlgo.gotypes import point_table
+from dlgo.tablebase import BLACK_WINS, DRAW, HEADER, UNREACHABLE, WHITE_WINS
+from dlgo.tablebase import position_index, read_header, side_to_move
+
+__all__ = ['TablebaseAgent']
+
+
+class TablebaseAgent(Agent):
+    # path是残局库文件 randomize为True时在多个最佳落子中随机选一个 否则选第一个
+    def __init__(self, path, randomize=True):
+        super().__init__()
+        self.path = path
+        self.randomize = randomize
+        self._open()
+
+    def _open(self):
+        with open(self.path, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.num_rows, self.num_cols, self.win_length, self._record_size = read_header(self._buffer)
+        self.last_estimation = None
+
+    # 查出局面的（结果, 最佳落子的格子序号列表）
+    def lookup(self, board):
+        if (board.num_rows, board.num_cols, board.win_length) != (self.num_rows, self.num_cols, self.win_length):
+            raise ValueError('tablebase is for %dx%d k=%s, not %dx%d k=%s' % (
+                self.num_rows, self.num_cols, self.win_length, board.num_rows, board.num_cols, board.win_length))
+        offset = HEADER.size + position_index(board) * self._record_size
+        result = self._buffer[offset]
+        mask = int.from_bytes(self._buffer[offset + 1:offset + self._record_size], 'little')
+        cells = []
+        i = 0
+        while mask:
+            if mask & 1:
+                cells.append(i)
+            mask >>= 1
+            i += 1
+        return result, cells
+
+    def select_move(self, game_state):
+        if game_state.is_over():
+            return Move.pass_turn()
+        # 表里只按棋盘上的子查 停过一手之后棋盘一样但该另一方下 查出来的结果和落子都不对
+        if side_to_move(game_state.board) != game_state.next_player:
+            raise ValueError('position is not in the tablebase: %s to move' % game_state.next_player.name)
+        result, cells = self.lookup(game_state.board)
+        if result == UNREACHABLE:
+            raise ValueError('position is not in the tablebase')
+
+        if result == BLACK_WINS:
+            self.last_estimation = Player.black
+        elif result == WHITE_WINS:
+            self.last_estimation = Player.white
+        elif result == DRAW:
+            self.last_estimation = False
+        # 棋盘已满或已分胜负 没有可下的点
+        if not cells:
+            return Move.pass_turn()
+
+        cell = random.choice(cells) if self.randomize else cells[0]
+        return Move.play(point_table(self.num_rows, self.num_cols)[cell])
+
+    def diagnostics(self):
+        return {'estimation': self.last_estimation}
+
+    def close(self):
+        self._buffer.close()
+
+    # mmap不能被pickle 送到子进程时只带上文件路径 在子进程里重新映射
+    def __getstate__(self):
+        return {'path': self.path, 'randomize': self.randomize}
+
+    def __setstate__(self, state):
+        self.path = state['path']
+        self.randomize = state['randomize']
+        self._open()
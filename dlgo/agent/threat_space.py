@@ -0,0 +1,221 @@
+"""
+    m,n,k棋（例如15x15的五子棋）用的威胁空间搜索机器人
+    大棋盘上无法穷举 这里只做三件事：
+        威胁检测：某条连线上只差一子且没有对方的子 空着的那一点就是必须立刻占（或立刻堵）的点
+        威胁空间搜索：进攻方只下能造成上述威胁的棋（冲四） 防守方只能去堵 直到进攻方同时有两个威胁或直接连成线
+            这就是连续冲四取胜（VCF） 搜索只在这些被迫的落子中展开 所以可以搜得很深
+        启发式：没有强制手时 只在已有棋子附近的点中按连线上的子数打分选点
+    每一步都有时间预算 超时的搜索当作没有找到结果
+"""
+
+import time
+
+from dlgo.agent.base import Agent
+from dlgo.goboard_slow import Move
+from dlgo.gotypes import point_table
+from dlgo.scoring import line_table
+from dlgo.search_board import SearchBoard
+
+__all__ = ['ThreatSpaceAgent']
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class ThreatSpaceAgent(Agent):
+    # time_limit是每一步的时间预算（秒） radius是候选点离已有棋子的最大距离 max_threats是威胁序列中进攻方最多下几手
+    def __init__(self, time_limit=1.0, radius=2, max_threats=10):
+        super().__init__()
+        self.time_limit = time_limit
+        self.radius = radius
+        self.max_threats = max_threats
+        self._deadline = None
+        self._failed = {}
+        self._last = {}
+
+    def select_move(self, game_state):
+        # 终局或棋盘已满时没有可下的点
+        if not game_state.legal_points():
+            return Move.pass_turn()
+        position = SearchBoard.from_game_state(game_state)
+        start = time.perf_counter()
+        self._deadline = start + self.time_limit
+        self._failed = {}
+        self._last = {'reason': None, 'sequence': None}
+
+        move = Move.play(self.choose_point(position))
+        self._last['seconds'] = time.perf_counter() - start
+        return move
+
+    def choose_point(self, position):
+        me = position.next_player
+        # 能直接连成线就赢
+        wins = self.winning_points(position, me)
+        if wins:
+            self._last['reason'] = 'win'
+            return wins[0]
+        # 对方下一手就能连成线 必须去堵 有两个以上时已经堵不住了 随便堵一个
+        blocks = self.winning_points(position, me.other)
+        if blocks:
+            self._last['reason'] = 'block'
+            return blocks[0]
+
+        # 自己有连续冲四取胜的手段
+        sequence = self.threat_sequence(position, me)
+        if sequence:
+            self._last['reason'] = 'threat_sequence'
+            self._last['sequence'] = sequence
+            return sequence[0]
+
+        candidates = self.ranked_candidates(position)
+        # 对方有连续冲四取胜的手段 在其中找一个能破解的点
+        their_sequence = self.threat_sequence(position, me.other)
+        if their_sequence:
+            defence = self.defend(position, their_sequence, candidates)
+            if defence is not None:
+                self._last['reason'] = 'defend'
+                return defence
+
+        self._last['reason'] = 'heuristic'
+        return candidates[0]
+
+    # player下一手就能连成线的点
+    @classmethod
+    def winning_points(cls, position, player):
+        table = line_table(position.num_rows, position.num_cols, position.win_length)
+        own = position.line_counts(player)
+        other = position.line_counts(player.other)
+        points = []
+        for index, line in enumerate(table.lines):
+            if other[index] == 0 and own[index] == len(line) - 1:
+                for point in line:
+                    if position.get(point) is None:
+                        if point not in points:
+                            points.append(point)
+                        break
+        return points
+
+    # player下了之后会造成威胁（某条连线只差一子）的点
+    @classmethod
+    def threat_points(cls, position, player):
+        table = line_table(position.num_rows, position.num_cols, position.win_length)
+        own = position.line_counts(player)
+        other = position.line_counts(player.other)
+        points = {}
+        for index, line in enumerate(table.lines):
+            if other[index] == 0 and own[index] == len(line) - 2:
+                for point in line:
+                    if position.get(point) is None:
+                        points[point] = None
+        return list(points)
+
+    # 找attacker连续冲四取胜的序列 返回[进攻, 防守, 进攻, ...] 找不到或超时返回None
+    # attacker不是轮到的一方时 相当于假设轮到的一方停一手 用来看对方的威胁
+    def threat_sequence(self, position, attacker):
+        mover = position.next_player
+        position.next_player = attacker
+        try:
+            return self._threat_search(position, attacker, self.max_threats)
+        except _OutOfTime:
+            return None
+        finally:
+            position.next_player = mover
+
+    # 轮到attacker下 它只下冲四 防守方只能去堵
+    def _threat_search(self, position, attacker, depth):
+        if self._out_of_time():
+            raise _OutOfTime()
+        defender = attacker.other
+        wins = self.winning_points(position, attacker)
+        if wins:
+            return [wins[0]]
+        if depth == 0:
+            return None
+        key = (attacker, position.position_key())
+        if self._failed.get(key, -1) >= depth:
+            return None
+
+        threats = self.threat_points(position, attacker)
+        # 防守方已经有威胁时 进攻方的冲四必须同时堵住它
+        their_wins = self.winning_points(position, defender)
+        if len(their_wins) > 1:
+            threats = []
+        elif their_wins:
+            threats = [point for point in threats if point == their_wins[0]]
+
+        for point in threats:
+            position.play(point)
+            gaps = self.winning_points(position, attacker)
+            sequence = None
+            if len(gaps) > 1:
+                # 两个威胁同时出现 防守方只能堵一个
+                sequence = [point, gaps[0], gaps[1]]
+            elif gaps:
+                position.play(gaps[0])
+                # 防守方堵的这一手自己连成了线 这条路走不通
+                if position.winner is None:
+                    rest = self._threat_search(position, attacker, depth - 1)
+                    if rest is not None:
+                        sequence = [point, gaps[0]] + rest
+                position.undo()
+            position.undo()
+            if sequence is not None:
+                return sequence
+
+        self._failed[key] = depth
+        return None
+
+    # 在对方的威胁序列经过的点和启发式的候选点中 找一个下了之后对方再也没有连续冲四的点
+    def defend(self, position, their_sequence, candidates):
+        in_sequence = set(their_sequence)
+        ordered = [point for point in candidates if point in in_sequence]
+        ordered += [point for point in candidates if point not in in_sequence]
+        me = position.next_player
+        for point in ordered:
+            if self._out_of_time():
+                return None
+            position.play(point)
+            refuted = self.threat_sequence(position, me.other) is None and not self._out_of_time()
+            position.undo()
+            if refuted:
+                return point
+        return None
+
+    def _out_of_time(self):
+        return time.perf_counter() > self._deadline
+
+    # 已有棋子附近的空点 按启发式分数从高到低 空棋盘时只有中心点
+    def ranked_candidates(self, position):
+        points = point_table(position.num_rows, position.num_cols)
+        stones = [point for point in points if position.get(point) is not None]
+        if not stones:
+            return [points[(position.num_rows // 2) * position.num_cols + position.num_cols // 2]]
+
+        radius = self.radius
+        candidates = {}
+        for stone in stones:
+            for row in range(max(1, stone.row - radius), min(position.num_rows, stone.row + radius) + 1):
+                for col in range(max(1, stone.col - radius), min(position.num_cols, stone.col + radius) + 1):
+                    point = points[(row - 1) * position.num_cols + (col - 1)]
+                    if position.get(point) is None:
+                        candidates[point] = None
+        me = position.next_player
+        return sorted(candidates, key=lambda point: -self.point_score(position, point, me))
+
+    # 落子点的分数：经过它的连线上 只有自己的子的越多越好（进攻） 只有对方的子的越多越要堵（防守）
+    @classmethod
+    def point_score(cls, position, point, player):
+        table = line_table(position.num_rows, position.num_cols, position.win_length)
+        own = position.line_counts(player)
+        other = position.line_counts(player.other)
+        score = 0
+        for index in table.point_lines.get(point, ()):
+            if other[index] == 0:
+                score += 10 ** own[index] * 2
+            if own[index] == 0:
+                score += 10 ** other[index]
+        return score
+
+    def diagnostics(self):
+        return dict(self._last)
@@ -0,0 +1,84 @@
+"""
+    置换表
+    同一个局面可以由不同的落子顺序到达 搜索时把已经算出确切胜负的局面记下来 再遇到时直接取用
+    键是（轮到谁下, 棋盘内容） 值是该局面确切的胜负结果以及对应的落子
+    α-β搜索得到的分数可能只是上界或下界 这时另外记下搜索深度和分数的性质
+"""
+
+from collections import OrderedDict
+from collections import namedtuple
+
+__all__ = [
+    'EXACT',
+    'LOWER_BOUND',
+    'UPPER_BOUND',
+    'TableEntry',
+    'TranspositionTable',
+]
+
+
+# 分数的性质：确切值 下界（发生了β截断） 上界（没有一手超过α）
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+# 表项 穷举搜索时result与thinking_action的返回值含义相同：阵营表示该阵营必胜 False表示平局
+# α-β搜索时result是轮到的一方视角的分数 depth是得到该分数的剩余搜索深度
+class TableEntry(namedtuple('TableEntry', 'result move depth flag', defaults=(None, EXACT))):
+    pass
+
+
+class TranspositionTable:
+    # max_size为None时不限大小 否则按最近最少使用（LRU）的顺序淘汰旧局面
+    def __init__(self, max_size=None):
+        assert max_size is None or max_size > 0
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        # 命中与未命中计数
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # 查表 没有则返回None
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.max_size is not None:
+            # 被用到的局面挪到队尾 淘汰时从队头开始
+            self._entries.move_to_end(key)
+        return entry
+
+    # 记录一个局面的结果
+    def store(self, key, result, move, depth=None, flag=EXACT):
+        self._entries[key] = TableEntry(result, move, depth, flag)
+        if self.max_size is not None:
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    # 把结果写到持久存储 内存中的表没有需要写的
+    def flush(self):
+        pass
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
@@ -0,0 +1,147 @@
+"""
+    紧凑的二进制棋谱文件 用来保存大量对局（例如自对弈的结果）
+    文件开头是MAGIC 之后一盘接一盘：
+        6字节的头：行数 列数 连线长度（0表示原来的整行整列规则） 结果（0平局 1黑胜 2白胜） 手数（2字节 小端）
+        每手一个字节：落子点在point_table中的序号 PASS和RESIGN是保留的值
+    所以棋盘最多MAX_POINTS个点（15x15的五子棋可以 19x19不行）
+    GameWriter以追加方式边下边写 read_games逐盘产出 都不会把整个文件读进内存
+    用法：
+        with GameWriter('games.dlgr') as writer:
+            writer.write(RecordedGame.from_game_state(game))
+        for game in read_games('games.dlgr'):
+            print(game_text(game))
+"""
+
+import struct
+from collections import namedtuple
+
+from dlgo.game_loop import move_text
+from dlgo.goboard_slow import Move
+from dlgo.gotypes import Player
+from dlgo.gotypes import point_table
+
+__all__ = [
+    'GameWriter',
+    'RecordedGame',
+    'decode_move',
+    'encode_move',
+    'game_text',
+    'read_games',
+]
+
+MAGIC = b'DLGR\x01'
+PASS = 253
+RESIGN = 254
+MAX_POINTS = 253
+
+_HEADER = struct.Struct('<BBBBH')
+_RESULTS = {None: 0, Player.black: 1, Player.white: 2}
+_WINNERS = {code: winner for winner, code in _RESULTS.items()}
+
+
+def encode_move(move, num_cols):
+    if move.is_pass:
+        return PASS
+    if move.is_resign:
+        return RESIGN
+    return (move.point.row - 1) * num_cols + (move.point.col - 1)
+
+
+def decode_move(code, num_rows, num_cols):
+    if code == PASS:
+        return Move.pass_turn()
+    if code == RESIGN:
+        return Move.resign()
+    if not 0 <= code < num_rows * num_cols:
+        raise ValueError('invalid move code %d for a %dx%d board' % (code, num_rows, num_cols))
+    return Move.play(point_table(num_rows, num_cols)[code])
+
+
+# 一盘棋 moves是编码后的bytes 每手一个字节 winner为None表示平局
+class RecordedGame(namedtuple('RecordedGame', 'num_rows num_cols win_length winner moves')):
+    @classmethod
+    def from_moves(cls, num_rows, num_cols, win_length, winner, moves):
+        if num_rows * num_cols > MAX_POINTS:
+            raise ValueError('board too large for the game file: %dx%d' % (num_rows, num_cols))
+        return cls(num_rows, num_cols, win_length, winner, bytes(encode_move(move, num_cols) for move in moves))
+
+    # 从终局的GameState沿着previous_state取出全部落子
+    @classmethod
+    def from_game_state(cls, game_state):
+        moves = []
+        state = game_state
+        while state.last_move is not None:
+            moves.append(state.last_move)
+            state = state.previous_state
+        moves.reverse()
+
+        board = game_state.board
+        return cls.from_moves(board.num_rows, board.num_cols, board.win_length, game_state.winning_player(), moves)
+
+    def move_list(self):
+        return [decode_move(code, self.num_rows, self.num_cols) for code in self.moves]
+
+    def encode(self):
+        header = _HEADER.pack(self.num_rows, self.num_cols, self.win_length or 0, _RESULTS[self.winner],
+                              len(self.moves))
+        return header + self.moves
+
+
+# 流式写入 append为True时接在已有文件的后面
+class GameWriter():
+    def __init__(self, path, append=True):
+        self._file = open(path, 'ab' if append else 'wb')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self.games = 0
+
+    def write(self, game):
+        self._file.write(game.encode())
+        self.games += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# 逐盘读出文件中的RecordedGame 文件损坏时抛出ValueError 信息里带着出错的字节偏移
+def read_games(path):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError('not a game file: %s' % path)
+        header_size = _HEADER.size
+        while True:
+            offset = f.tell()
+            header = f.read(header_size)
+            if not header:
+                return
+            if len(header) < header_size:
+                raise ValueError('truncated game header at byte %d in %s' % (offset, path))
+            num_rows, num_cols, win_length, result, num_moves = _HEADER.unpack(header)
+            if result not in _WINNERS:
+                raise ValueError('invalid result %d at byte %d in %s' % (result, offset + 3, path))
+            moves = f.read(num_moves)
+            if len(moves) < num_moves:
+                raise ValueError('truncated game at byte %d in %s' % (offset, path))
+            num_points = num_rows * num_cols
+            for i, code in enumerate(moves):
+                if code >= num_points and code not in (PASS, RESIGN):
+                    raise ValueError('invalid move code %d at byte %d in %s' % (code, offset + header_size + i, path))
+            yield RecordedGame(num_rows, num_cols, win_length or None, _WINNERS[result], moves)
+
+
+# 一盘棋的文字形式 例如：3x3 black wins: B2 A1 C3 pass
+def game_text(game):
+    rules = '%dx%d' % (game.num_rows, game.num_cols)
+    if game.win_length is not None:
+        rules += ' k=%d' % game.win_length
+    result = 'draw' if game.winner is None else '%s wins' % game.winner.name
+    return '%s %s: %s' % (rules, result, ' '.join(move_text(move) for move in game.move_list()))
@@ -0,0 +1,138 @@
+"""
+    与界面无关的对局驱动
+    run_game轮流向双方要落子 直到对局结束 界面通过前端（Frontend）接入：
+        NullFrontend     不显示 不限帧率 用于机器人之间的对局和没有显示器的服务器
+        TerminalFrontend 用dlgo.utils.print_board在终端打印 人类从键盘输入
+        PygameFrontend   在exhibitor.py里 用pygame窗口显示 人类用鼠标落子
+    players是{阵营: Agent} 值为None表示这一方由人类通过前端下
+"""
+
+import logging
+import time
+
+from dlgo.agent.helpers import selected_move
+from dlgo.goboard_slow import Move
+
+__all__ = [
+    'Frontend',
+    'NullFrontend',
+    'TerminalFrontend',
+    'move_text',
+    'parse_move',
+    'run_game',
+]
+
+logger = logging.getLogger(__name__)
+
+
+# 前端接口 show在每步之前调用 ask_move向人类要一步棋 game_over在对局结束时调用
+# think让机器人下一步 图形界面可以把它放到后台 自己继续处理窗口事件
+class Frontend:
+    def show(self, game_state):
+        pass
+
+    def ask_move(self, game_state):
+        raise NotImplementedError()
+
+    def think(self, agent, game_state):
+        return agent.select_move(game_state)
+
+    def show_move(self, player, move):
+        pass
+
+    def game_over(self, game_state):
+        pass
+
+
+# 什么都不显示 也不能让人类下棋
+class NullFrontend(Frontend):
+    def ask_move(self, game_state):
+        raise ValueError('NullFrontend cannot ask a human for a move')
+
+
+# 终端前端 输入形如A1的坐标 输入pass则停一手
+# 输入结束（管道读完或Ctrl-D）视为认输 与关闭pygame窗口相同
+class TerminalFrontend(Frontend):
+    def __init__(self, input_func=input):
+        self.input_func = input_func
+
+    def show(self, game_state):
+        from dlgo.utils import print_board
+        print_board(game_state.board)
+
+    def ask_move(self, game_state):
+        while True:
+            try:
+                text = self.input_func('-- ')
+            except EOFError:
+                return Move.resign()
+            try:
+                move = parse_move(text)
+            except ValueError:
+                continue
+            if move.is_play and not game_state.board.is_on_grid(move.point):
+                continue
+            if game_state.is_valid_move(move):
+                return move
+
+    def show_move(self, player, move):
+        from dlgo.utils import print_move
+        print_move(player, move)
+
+    def game_over(self, game_state):
+        from dlgo.utils import print_board
+        print_board(game_state.board)
+
+
+# 下完一盘棋 返回终局的GameState
+# on_move(game_state, move, seconds)在每步之后调用 seconds是这一步的思考时间
+# log_diagnostics为True时 机器人每下一步就把它的diagnostics()写进日志（INFO级别）
+def run_game(game_state, players, frontend=None, on_move=None, log_diagnostics=False):
+    if frontend is None:
+        frontend = NullFrontend()
+
+    while not game_state.is_over():
+        frontend.show(game_state)
+        agent = players.get(game_state.next_player)
+        start = time.perf_counter()
+        if agent is None:
+            move = frontend.ask_move(game_state)
+        else:
+            move = selected_move(frontend.think(agent, game_state))
+        seconds = time.perf_counter() - start
+        if log_diagnostics and agent is not None:
+            logger.info("%s %s %.6fs %s", game_state.next_player, move_text(move), seconds, agent.diagnostics())
+
+        frontend.show_move(game_state.next_player, move)
+        if on_move is not None:
+            on_move(game_state, move, seconds)
+        game_state = game_state.apply_move(move)
+
+    frontend.game_over(game_state)
+    return game_state
+
+
+# 解析形如A1的坐标 或pass resign（不分大小写） 不能解析时抛出ValueError
+def parse_move(text):
+    from dlgo.utils import point_from_coords
+    text = text.strip().upper()
+    if text == 'PASS':
+        return Move.pass_turn()
+    if text == 'RESIGN':
+        return Move.resign()
+    try:
+        return Move.play(point_from_coords(text))
+    except (ValueError, IndexError):
+        raise ValueError('cannot parse move: %r' % (text,))
+
+
+# 与parse_move相反 把move写成A1 pass resign
+def move_text(move):
+    if move is None:
+        return None
+    if move.is_pass:
+        return 'pass'
+    if move.is_resign:
+        return 'resign'
+    from dlgo.utils import coords_from_point
+    return coords_from_point(move.point)
@@ -0,0 +1,147 @@
+from dlgo import goboard_slow
+from dlgo.gotypes import Player
+from dlgo.gotypes import point_table
+from dlgo.goboard_slow import Move
+from dlgo.scoring import line_table
+
+__all__ = [
+    'Board',
+    'GameState',
+    'Move',
+]
+
+"""
+    解读：
+        与goboard_slow接口相同的棋盘引擎 区别在于棋盘的储存方式
+            每个阵营的棋子用一个整数表示 第(row-1)*num_cols+(col-1)位为1表示该点有子
+            复制棋盘只需复制两个整数 不必deepcopy字典
+            胜负判断变成与预先算好的连线掩码做按位与 落子时只看经过该点的连线
+        Move直接沿用goboard_slow的 两个引擎的动作可以混用
+        GameState继承goboard_slow的 只换掉棋盘类和复制棋盘的函数
+"""
+
+
+# 每种棋盘大小的连线掩码 按需生成后缓存
+_line_masks = {}
+
+
+# 由scoring的连线表生成掩码 返回每一位到经过它的连线掩码的索引
+def line_masks(num_rows, num_cols, win_length=None):
+    key = (num_rows, num_cols, win_length)
+    masks = _line_masks.get(key)
+    if masks is not None:
+        return masks
+
+    def bit(point):
+        return 1 << ((point.row - 1) * num_cols + (point.col - 1))
+
+    table = line_table(num_rows, num_cols, win_length)
+    lines = []
+    for line in table.lines:
+        mask = 0
+        for point in line:
+            mask |= bit(point)
+        lines.append(mask)
+    point_masks = {}
+    for point, indexes in table.point_lines.items():
+        point_masks[bit(point)] = tuple(lines[index] for index in indexes)
+
+    _line_masks[key] = point_masks
+    return point_masks
+
+
+# 位棋盘 black和white各是一个整数
+class Board():
+    def __init__(self, num_rows, num_cols, win_length=None):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.win_length = win_length
+        self._black = 0
+        self._white = 0
+        self._point_masks = line_masks(num_rows, num_cols, win_length)
+        # 第i位对应point_table的第i个点
+        self._points = point_table(num_rows, num_cols)
+        self._full = (1 << (num_rows * num_cols)) - 1
+        self._winner = None
+
+    def _bit(self, point):
+        return 1 << ((point.row - 1) * self.num_cols + (point.col - 1))
+
+    def place_stone(self, player, point):
+        assert self.is_on_grid(point)
+        assert self.get(point) is None
+
+        bit = self._bit(point)
+        if player == Player.black:
+            self._black |= bit
+            stones = self._black
+        else:
+            self._white |= bit
+            stones = self._white
+
+        # 只需检查经过这个点的连线
+        if self._winner is None:
+            # 不在任何连线上的点（win_length比某个方向长时）没有条目
+            for mask in self._point_masks.get(bit, ()):
+                if stones & mask == mask:
+                    self._winner = player
+                    break
+
+    def is_on_grid(self, point):
+        return 1 <= point.row <= self.num_rows and \
+               1 <= point.col <= self.num_cols
+
+    def get(self, point):
+        bit = self._bit(point)
+        if self._black & bit:
+            return Player.black
+        if self._white & bit:
+            return Player.white
+        return None
+
+    # 复制只需要复制两个整数 连线掩码是共享的
+    def copy(self):
+        board = Board.__new__(Board)
+        board.num_rows = self.num_rows
+        board.num_cols = self.num_cols
+        board.win_length = self.win_length
+        board._black = self._black
+        board._white = self._white
+        board._point_masks = self._point_masks
+        board._points = self._points
+        board._full = self._full
+        board._winner = self._winner
+        return board
+
+    def __deepcopy__(self, memodict={}):
+        return self.copy()
+
+    # 所有空点 按位从低到高即按行优先的顺序
+    def empty_points(self):
+        empty = self._full & ~(self._black | self._white)
+        points = []
+        while empty:
+            low = empty & -empty
+            points.append(self._points[low.bit_length() - 1])
+            empty ^= low
+        return points
+
+    # 胜负在落子时已经用连线掩码算好 scoring.evaluate_win会优先调用棋盘自带的这个方法
+    def evaluate_win(self):
+        return self._winner
+
+    def position_key(self):
+        return self._black, self._white
+
+    def __eq__(self, other):
+        return isinstance(other, Board) and \
+               self.num_rows == other.num_rows and \
+               self.num_cols == other.num_cols and \
+               self._black == other._black and \
+               self._white == other._white
+
+
+# 对局逻辑与goboard_slow完全相同 只是换成位棋盘 复制时用Board.copy
+class GameState(goboard_slow.GameState):
+    board_class = Board
+    copy_board = staticmethod(Board.copy)
@@ -1,11 +1,11 @@
-import numpy as np
 # tag::imports[]
 import copy
 from dlgo.gotypes import Player
 # end::imports[]
-from dlgo.gotypes import Point
+from dlgo.gotypes import point_table
+from dlgo.history import MoveHistory
 from dlgo.scoring import compute_game_result
-from dlgo.scoring import evaluate_win
+from dlgo.scoring import line_table
 
 __all__ = [
     'Board',
@@ -92,12 +92,25 @@ class GoString():  # <1>
 # 棋盘 数据结构对象 储存了棋盘的大小和一个不知道干嘛用和怎么用的_grid
 # tag::board_init[]
 class Board():  # <1>
-    def __init__(self, num_rows, num_cols):
+    def __init__(self, num_rows, num_cols, win_length=None):
         # 基本参数 行列
         self.num_rows = num_rows
         self.num_cols = num_cols
+        # 几子连线算赢 None表示要连满整行整列（原本的规则）
+        self.win_length = win_length
         # 棋块的集合 键是棋块中的每个点 值是棋块对象
         self._grid = {}
+        # 连线表 同一大小的棋盘共享
+        self._line_table = line_table(num_rows, num_cols, win_length)
+        # 每条连线上双方各有几个子 落子时增量更新
+        self._line_counts = {
+            Player.black: [0] * len(self._line_table.lines),
+            Player.white: [0] * len(self._line_table.lines),
+        }
+        # 已经连成线的一方
+        self._winner = None
+        # 空点 用字典当作有序集合 保持按行优先的顺序
+        self._empty = dict.fromkeys(point_table(num_rows, num_cols))
 
     # <1> A board is initialized as empty grid with the specified number of rows and columns.
     # end::board_init[]
@@ -113,6 +126,15 @@ class Board():  # <1>
         assert self.get(point) is None
 
         self._grid[point] = player
+        del self._empty[point]
+
+        # 只需检查经过这个点的连线 不在任何连线上的点没有条目
+        counts = self._line_counts[player]
+        lines = self._line_table.lines
+        for index in self._line_table.point_lines.get(point, ()):
+            counts[index] += 1
+            if counts[index] == len(lines[index]) and self._winner is None:
+                self._winner = player
 
     # 判断一个落子点是否出界
     # tag::board_utils[]
@@ -129,6 +151,34 @@ class Board():  # <1>
     # <2> Returns the entire string of stones at a point: a GoString if there is a stone on that point or else None.
     # end::board_utils[]
 
+    # 棋盘内容的键 可哈希 内容相同的棋盘键相同 用于置换表
+    def position_key(self):
+        return frozenset(self._grid.items())
+
+    # 所有空点 落子时增量维护 不必扫描整个棋盘
+    def empty_points(self):
+        return list(self._empty)
+
+    # 胜负在落子时已经算好 scoring.evaluate_win会直接用这里的结果
+    def evaluate_win(self):
+        return self._winner
+
+    # 复制时连线表共享 只复制棋子和计数
+    def __deepcopy__(self, memodict={}):
+        board = Board.__new__(Board)
+        board.num_rows = self.num_rows
+        board.num_cols = self.num_cols
+        board.win_length = self.win_length
+        board._grid = dict(self._grid)
+        board._line_table = self._line_table
+        board._line_counts = {
+            Player.black: list(self._line_counts[Player.black]),
+            Player.white: list(self._line_counts[Player.white]),
+        }
+        board._winner = self._winner
+        board._empty = dict(self._empty)
+        return board
+
     # 判断一个棋块是不是和另一个一样
     def __eq__(self, other):
         return isinstance(other, Board) and \
@@ -140,6 +190,9 @@ class Board():  # <1>
 # 数据结构 动作 交给棋盘处理的数据结构 具有落子 pass 和 认输 三个互斥状态
 # tag::moves[]
 class Move():  # <1>
+    # 搜索中会生成大量Move 不要每个实例的__dict__
+    __slots__ = ('point', 'is_play', 'is_pass', 'is_resign')
+
     def __init__(self, point=None, is_pass=False, is_resign=False):
         assert (point is not None) ^ is_pass ^ is_resign
         self.point = point
@@ -148,19 +201,40 @@ class Move():  # <1>
         self.is_resign = is_resign
 
     # 用于得到落子动作的数据结构 输入一个point数据结构 输出一个point状态的move
+    # 同一个点的move只生成一次 之后都返回同一个对象 可以直接用is比较
     @classmethod
     def play(cls, point):  # <2>
-        return Move(point=point)
+        move = _play_moves.get(point)
+        if move is None:
+            move = _play_moves[point] = Move(point=point)
+        return move
 
-    # 用于得到pass动作的数据结构
+    # 用于得到pass动作的数据结构 总是同一个对象
     @classmethod
     def pass_turn(cls):  # <3>
-        return Move(is_pass=True)
+        return _PASS
 
-    # 用于得到认输动作的数据结构
+    # 用于得到认输动作的数据结构 总是同一个对象
     @classmethod
     def resign(cls):  # <4>
-        return Move(is_resign=True)
+        return _RESIGN
+
+    # 反序列化时取回共享的对象 而不是生成新的
+    def __reduce__(self):
+        if self.is_pass:
+            return Move.pass_turn, ()
+        if self.is_resign:
+            return Move.resign, ()
+        return Move.play, (self.point,)
+
+    def __deepcopy__(self, memodict={}):
+        return self
+
+
+# 点到落子move的表 所有棋盘共用
+_play_moves = {}
+_PASS = Move(is_pass=True)
+_RESIGN = Move(is_resign=True)
 
 
 # <1> Any action a player can play on a turn, either is_play, is_pass or is_resign will be set.
@@ -171,40 +245,77 @@ class Move():  # <1>
 
 
 # 棋盘 储存棋盘状态 储存落子顺序 处理move和更新棋盘
+# 两种引擎共用这个类 goboard_fast的GameState只换掉board_class和copy_board
 # tag::game_state[]
 class GameState():
-    def __init__(self, board, next_player, previous, move):
+    # 棋盘类和复制棋盘的函数
+    board_class = Board
+    copy_board = staticmethod(copy.deepcopy)
+
+    def __init__(self, board, next_player, previous, move, history=None, ply=0):
         # 棋盘状态
         self.board = board
         # 落子顺序
         self.next_player = next_player
         # 储存前一状态 用链的形式储存棋谱（状态） 也就是上一个自己
-        self.previous_state = previous
+        # 紧凑棋谱模式下为None 需要时由history重建
+        self._previous_state = previous
         # 储存上一move
         self.last_move = move
+        # 紧凑棋谱（MoveHistory） 为None时用previous_state链
+        self.history = history
+        # 已经下了几手
+        self.ply = ply
+        # 连成线的一方和是否终局 生成状态时算一次 之后is_over winner等都直接用
+        self.board_winner = board.evaluate_win()
+        self._over = self._compute_over()
 
     # 以move更新棋盘
     def apply_move(self, move):  # <1>
         # 创建一个next_board变量 作为下一个状态的棋盘
         if move.is_play:
             # 如果落子了 就把落子点加上
-            # 深复制棋盘 加上新子
-            next_board = copy.deepcopy(self.board)
+            # 复制棋盘 加上新子
+            next_board = self.copy_board(self.board)
             # 注意place_stone这个方法 落子更新棋块 使得棋盘变成船新的棋盘
             next_board.place_stone(self.next_player, move.point)
         else:
             # 如果没落子 就棋盘原封不动
             next_board = self.board
         # 返回下一个状态 注意返回了一个新的GameState对象
-        return GameState(next_board, self.next_player.other, self, move)
+        if self.history is not None:
+            # 紧凑棋谱只记下这一手 不引用上一个状态
+            history = self.history.extended(self.ply, move, next_board)
+            return type(self)(next_board, self.next_player.other, None, move, history, self.ply + 1)
+        return type(self)(next_board, self.next_player.other, self, move, ply=self.ply + 1)
 
     # 生成一个初始状态 自己生成自己的类方法
+    # compact_history为True时用紧凑棋谱 每隔snapshot_interval手记一个棋盘快照（None表示只有初始棋盘）
     @classmethod
-    def new_game(cls, board_size):
+    def new_game(cls, board_size, win_length=None, compact_history=False, snapshot_interval=None):
         if isinstance(board_size, int):
             board_size = (board_size, board_size)
-        board = Board(*board_size)
-        return GameState(board, Player.black, None, None)
+        board = cls.board_class(*board_size, win_length=win_length)
+        history = MoveHistory(board, Player.black, snapshot_interval) if compact_history else None
+        return cls(board, Player.black, None, None, history)
+
+    # 上一个状态 紧凑棋谱模式下每次访问都从快照重建
+    @property
+    def previous_state(self):
+        if self.history is None or self.ply == 0:
+            return self._previous_state
+        ply = self.ply - 1
+        return type(self)(self.history.board_at(ply), self.history.player_at(ply), None,
+                         self.history.move_at(ply), self.history, ply)
+
+    # 上上一步 不需要重建棋盘
+    @property
+    def second_last_move(self):
+        if self.history is not None:
+            return self.history.move_at(self.ply - 1)
+        if self._previous_state is None:
+            return None
+        return self._previous_state.last_move
 
     @property
     def situation(self):
@@ -215,7 +326,7 @@ class GameState():
     # 判断一个落子点是否合法
     # tag::is_valid_move[]
     def is_valid_move(self, move):
-        if self.is_over():
+        if self._over:
             return False
         if move.is_pass or move.is_resign:
             return True
@@ -225,6 +336,10 @@ class GameState():
     # 如果连续两次pass 则结束
     # tag::is_over[]
     def is_over(self):
+        return self._over
+
+    # 生成状态时判断是否终局
+    def _compute_over(self):
         # 如果处于刚开始的时候 就没结束
         if self.last_move is None:
             return False
@@ -232,25 +347,25 @@ class GameState():
         if self.last_move.is_resign:
             return True
         # 取上上一步
-        second_last_move = self.previous_state.last_move
+        second_last_move = self.second_last_move
         # 如果处于刚开始的时候 就没结束
         if second_last_move is None:
             return False
-        if evaluate_win(self.board) is not None:
+        if self.board_winner is not None:
             return True
         # 如果连续两次pass 则结束
         return self.last_move.is_pass and second_last_move.is_pass
 
-    # 返回所有合法落子点的move
+    # 所有可以落子的点 终局时没有 只判断一次是否终局
     # end::is_over[]
-    def legal_moves(self):
-        moves = []
+    def legal_points(self):
+        if self._over:
+            return []
+        return self.board.empty_points()
 
-        for row in range(1, self.board.num_rows + 1):
-            for col in range(1, self.board.num_cols + 1):
-                move = Move.play(Point(row, col))
-                if self.is_valid_move(move):
-                    moves.append(move)
+    # 返回所有合法落子点的move
+    def legal_moves(self):
+        moves = [Move.play(point) for point in self.legal_points()]
         # These two moves are always legal.
         moves.append(Move.pass_turn())
         moves.append(Move.resign())
@@ -260,7 +375,7 @@ class GameState():
     # 判断谁是赢家
     def winner(self):
         # 如果游戏没有结束 就还没有赢家
-        if not self.is_over():
+        if not self._over:
             return None
         # 如果上一步有人投降 则下一步的是赢家
         if self.last_move.is_resign:
@@ -268,3 +383,11 @@ class GameState():
         # 算点
         game_result = compute_game_result(self)
         return game_result
+
+    # 赢家的阵营 平局或者还没结束时为None
+    # winner()在认输时直接返回阵营 否则返回GameResult 这里统一成阵营
+    def winning_player(self):
+        winner = self.winner()
+        if winner is not None and not isinstance(winner, Player):
+            winner = winner.winner
+        return winner
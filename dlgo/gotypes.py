@@ -12,6 +12,9 @@ class Player(enum.Enum):
 
 
 class Point(namedtuple('Point', 'row col')):
+    # 不要每个实例的__dict__ 只占一个二元组的内存
+    __slots__ = ()
+
     def neighbors(self):
         return [
             Point(self.row - 1, self.col),
@@ -22,3 +25,17 @@ class Point(namedtuple('Point', 'row col')):
 
     def __deepcopy__(self, memodict={}):
         return self
+
+
+# 每种棋盘大小的所有点 按行优先排列 键是（行数, 列数）
+# 同一大小的棋盘共用同一组Point对象 第(row-1)*num_cols+(col-1)个是Point(row, col)
+_point_tables = {}
+
+
+def point_table(num_rows, num_cols):
+    key = (num_rows, num_cols)
+    table = _point_tables.get(key)
+    if table is None:
+        table = tuple(Point(row=r, col=c) for r in range(1, num_rows + 1) for c in range(1, num_cols + 1))
+        _point_tables[key] = table
+    return table
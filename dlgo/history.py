@@ -0,0 +1,69 @@
+import copy
+
+__all__ = [
+    'MoveHistory',
+]
+
+"""
+    解读：
+        紧凑的棋谱 代替previous_state链
+            previous_state链上每个GameState都带着自己的一份棋盘 一盘棋的内存随手数平方增长
+            MoveHistory只记落子序列 GameState只保留当前棋盘和自己在棋谱中的手数（ply）
+            需要更早的局面时 从不晚于它的最近一个快照开始重放落子
+            snapshot_interval不为None时 每隔这么多手记一个快照（直接引用那一手的棋盘 棋盘生成后不再修改）
+        同一份棋谱由一条线上的所有GameState共享 只会在末尾追加
+            从不在末尾的局面落子（搜索中的分支）时 复制出前缀作为新的棋谱 原棋谱不变
+            所以每个GameState的前ply手永远不会被改动
+"""
+
+
+class MoveHistory():
+    def __init__(self, initial_board, first_player, snapshot_interval=None):
+        # 第一手由谁下 之后每一手（包括pass）交替
+        self.first_player = first_player
+        self.snapshot_interval = snapshot_interval
+        # 落子序列 第i手是moves[i - 1]
+        self.moves = []
+        # 手数到那一手之后的棋盘 第0手是初始棋盘
+        self.snapshots = {0: initial_board}
+
+    def __len__(self):
+        return len(self.moves)
+
+    # 第ply手之后由谁下
+    def player_at(self, ply):
+        return self.first_player if ply % 2 == 0 else self.first_player.other
+
+    # 第ply手的move 开局之前为None
+    def move_at(self, ply):
+        if ply <= 0:
+            return None
+        return self.moves[ply - 1]
+
+    # 在第ply手之后下move 得到棋盘board 返回记着这一手的棋谱
+    # ply正好在末尾时原地追加 否则复制出前缀再追加
+    def extended(self, ply, move, board):
+        history = self if ply == len(self.moves) else self._branch(ply)
+        history.moves.append(move)
+        length = len(history.moves)
+        if history.snapshot_interval and length % history.snapshot_interval == 0:
+            history.snapshots[length] = board
+        return history
+
+    def _branch(self, ply):
+        history = MoveHistory.__new__(MoveHistory)
+        history.first_player = self.first_player
+        history.snapshot_interval = self.snapshot_interval
+        history.moves = self.moves[:ply]
+        history.snapshots = {n: board for n, board in self.snapshots.items() if n <= ply}
+        return history
+
+    # 重建第ply手之后的棋盘 返回一份新的棋盘
+    def board_at(self, ply):
+        start = max(n for n in self.snapshots if n <= ply)
+        board = copy.deepcopy(self.snapshots[start])
+        for n in range(start, ply):
+            move = self.moves[n]
+            if move.is_play:
+                board.place_stone(self.player_at(n), move.point)
+        return board
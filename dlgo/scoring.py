@@ -2,7 +2,7 @@
 from __future__ import absolute_import
 from collections import namedtuple
 
-from dlgo.gotypes import Player, Point
+from dlgo.gotypes import Player, point_table
 # end::scoring_imports[]
 
 
@@ -33,64 +33,89 @@ trivially dead groups.
 """
 
 
+# 连线表的缓存 键是（行数, 列数, 连子数）
+_line_tables = {}
+
+
+# 连线表 lines是所有能决定胜负的连线（每条是一组point）
+# point_lines是每个点到经过它的连线编号的索引
+class LineTable(namedtuple('LineTable', 'lines point_lines')):
+    pass
+
+
+# 生成某种棋盘大小的连线表
+# win_length为None时沿用原来的规则：整行 整列 方形棋盘的两条对角线
+# 否则为m,n,k规则：横竖斜任意连续win_length个同色子即胜 win_length必须在1到较长的一边之间
+def line_table(num_rows, num_cols, win_length=None):
+    key = (num_rows, num_cols, win_length)
+    table = _line_tables.get(key)
+    if table is not None:
+        return table
+    if win_length is not None and not 1 <= win_length <= max(num_rows, num_cols):
+        raise ValueError('win_length must be between 1 and %d, got %r' % (max(num_rows, num_cols), win_length))
+
+    # 连线上的点取自共享的点表 不另外生成Point
+    points = point_table(num_rows, num_cols)
+
+    def at(row, col):
+        return points[(row - 1) * num_cols + (col - 1)]
+
+    lines = []
+    if win_length is None:
+        for r in range(1, num_rows + 1):
+            lines.append(tuple(at(r, c) for c in range(1, num_cols + 1)))
+        for c in range(1, num_cols + 1):
+            lines.append(tuple(at(r, c) for r in range(1, num_rows + 1)))
+        if num_rows == num_cols:
+            lines.append(tuple(at(i, i) for i in range(1, num_rows + 1)))
+            lines.append(tuple(at(i, num_cols + 1 - i) for i in range(1, num_rows + 1)))
+    else:
+        # 横 竖 撇 捺 四个方向
+        for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for r in range(1, num_rows + 1):
+                for c in range(1, num_cols + 1):
+                    end_row = r + d_row * (win_length - 1)
+                    end_col = c + d_col * (win_length - 1)
+                    if 1 <= end_row <= num_rows and 1 <= end_col <= num_cols:
+                        lines.append(tuple(at(r + d_row * i, c + d_col * i) for i in range(win_length)))
+
+    point_lines = {}
+    for index, line in enumerate(lines):
+        for point in line:
+            point_lines.setdefault(point, []).append(index)
+    point_lines = {point: tuple(indexes) for point, indexes in point_lines.items()}
+
+    table = LineTable(tuple(lines), point_lines)
+    _line_tables[key] = table
+    return table
+
+
 #
 # tag::scoring_evaluate_territory[]
 # 计算胜负
 def evaluate_win(board):
-    winner = None
-
-    # 每行是不是连起来
-    for r in range(1, board.num_rows + 1):
-        is_link = True
-        for c in range(2, board.num_cols + 1):
-            if board.get(Point(row=r, col=c)) is None:
-                is_link = False
-            if board.get(Point(row=r, col=c)) != board.get(Point(row=r, col=c - 1)):
-                is_link = False
-        if is_link:
-            winner = board.get(Point(row=r, col=1))
-            return winner
-
-    # 每列是不是连起来
-    for c in range(1, board.num_cols + 1):
-        is_link = True
-        for r in range(2, board.num_rows + 1):
-            if board.get(Point(row=r, col=c)) is None:
-                is_link = False
-            if board.get(Point(row=r, col=c)) != board.get(Point(row=r - 1, col=c)):
-                is_link = False
-        if is_link:
-            winner = board.get(Point(row=1, col=c))
-            return winner
-
-    # 撇是不是连起来
-    is_link = True
-    for c in range(2, board.num_cols + 1):
-        if board.get(Point(row=c, col=c)) is None:
-            is_link = False
-        if board.get(Point(row=c, col=c)) != board.get(Point(row=c - 1, col=c - 1)):
-            is_link = False
-    if is_link:
-        winner = board.get(Point(row=1, col=1))
-        return winner
-
-    # 捺是不是连起来
-    is_link = True
-    for c in range(2, board.num_cols + 1):
-        if board.get(Point(row=c, col=board.num_rows + 1 - c)) is None:
-            is_link = False
-        if board.get(Point(row=c, col=board.num_rows + 1 - c)) != board.get(Point(row=c - 1, col=board.num_rows - c + 2)):
-            is_link = False
-    if is_link:
-        winner = board.get(Point(row=1, col=board.num_rows))
-        return winner
-
-    return winner
+    # 自带胜负判断的棋盘（两种引擎的棋盘都在落子时增量维护了胜负）直接用它自己的
+    board_evaluate_win = getattr(board, 'evaluate_win', None)
+    if board_evaluate_win is not None:
+        return board_evaluate_win()
+
+    # 否则逐条连线检查
+    table = line_table(board.num_rows, board.num_cols, getattr(board, 'win_length', None))
+    for line in table.lines:
+        first = board.get(line[0])
+        if first is None:
+            continue
+        if all(board.get(point) == first for point in line[1:]):
+            return first
+    return None
 
 
 # 计算赢家
 # tag::scoring_compute_game_result[]
 def compute_game_result(game_state):
+    # GameState在生成时已经算好了连成线的一方
+    if hasattr(game_state, 'board_winner'):
+        return GameResult(game_state.board_winner)
     # 判断有没有连星
     winner = evaluate_win(game_state.board)
     return GameResult(winner)
@@ -0,0 +1,80 @@
+"""
+    批量计算胜负
+    输入形状为(N, 行数, 列数)的int8数组 每格空为0 黑为1 白为2（即Player的值）
+    一次算出N个棋盘的赢家 用预先算好的连线下标做gather 再沿连线方向归约 代替在Python里逐个调用evaluate_win
+    结果与scoring.evaluate_win一致：多条连线同时成立时取连线表中靠前的那条
+"""
+
+import numpy as np
+
+from dlgo.gotypes import Point
+from dlgo.scoring import line_table
+
+__all__ = [
+    'boards_to_array',
+    'evaluate_win_batch',
+    'line_indices',
+]
+
+# 每种棋盘大小的连线下标 键是（行数, 列数, 连子数）
+_line_indices = {}
+
+
+# 连线下标 返回一组(连线在连线表中的序号数组, 格子下标数组)
+# 原规则下长方形棋盘的行和列长度不同 所以按长度分组 每组的格子下标形状为(连线数, 长度)
+def line_indices(num_rows, num_cols, win_length=None):
+    key = (num_rows, num_cols, win_length)
+    groups = _line_indices.get(key)
+    if groups is not None:
+        return groups
+
+    by_length = {}
+    for number, line in enumerate(line_table(num_rows, num_cols, win_length).lines):
+        cells = [(point.row - 1) * num_cols + (point.col - 1) for point in line]
+        numbers, indices = by_length.setdefault(len(line), ([], []))
+        numbers.append(number)
+        indices.append(cells)
+
+    groups = tuple((np.array(numbers, dtype=np.intp), np.array(indices, dtype=np.intp))
+                   for numbers, indices in by_length.values())
+    _line_indices[key] = groups
+    return groups
+
+
+# 把若干Board转成(N, 行数, 列数)的int8数组
+def boards_to_array(boards):
+    boards = list(boards)
+    if not boards:
+        return np.zeros((0, 0, 0), dtype=np.int8)
+    num_rows, num_cols = boards[0].num_rows, boards[0].num_cols
+    array = np.zeros((len(boards), num_rows, num_cols), dtype=np.int8)
+    for n, board in enumerate(boards):
+        for r in range(1, num_rows + 1):
+            for c in range(1, num_cols + 1):
+                stone = board.get(Point(row=r, col=c))
+                if stone is not None:
+                    array[n, r - 1, c - 1] = stone.value
+    return array
+
+
+# 批量判断胜负 返回长度为N的int8数组 0表示没有赢家 1黑胜 2白胜
+def evaluate_win_batch(boards, win_length=None):
+    boards = np.asarray(boards, dtype=np.int8)
+    num_boards, num_rows, num_cols = boards.shape
+    flat = boards.reshape(num_boards, num_rows * num_cols)
+    groups = line_indices(num_rows, num_cols, win_length)
+    num_lines = sum(len(numbers) for numbers, _ in groups)
+    if num_lines == 0:
+        return np.zeros(num_boards, dtype=np.int8)
+
+    # 每个棋盘每条连线上的赢家
+    line_winners = np.zeros((num_boards, num_lines), dtype=np.int8)
+    for numbers, indices in groups:
+        stones = flat[:, indices]
+        first = stones[:, :, 0]
+        linked = (first != 0) & (stones == first[:, :, None]).all(axis=2)
+        line_winners[:, numbers] = np.where(linked, first, 0)
+
+    # 取每个棋盘第一条成立的连线
+    first_line = (line_winners != 0).argmax(axis=1)
+    return line_winners[np.arange(num_boards), first_line]
@@ -0,0 +1,142 @@
+from dlgo.gotypes import Player
+from dlgo.gotypes import point_table
+from dlgo.scoring import line_table
+
+__all__ = [
+    'SearchBoard',
+]
+
+"""
+    解读：
+        搜索用的可变棋盘 GameState每走一步都要生成新对象并复制棋盘 搜索树上每个节点都要分配内存
+        SearchBoard在原地落子（play）和悔棋（undo） 搜索时沿着同一个对象走遍整棵树
+            每格的子 每条连线上双方的子数 双方棋子的位掩码 空点的位掩码 都在落子和悔棋时增量更新
+            胜负只可能由最后一手产生 悔掉这一手胜负就清空
+        对局本身依然用不可变的GameState 只在搜索开始时由from_game_state复制一次
+        提供与Board相同的get num_rows num_cols win_length evaluate_win empty_points position_key
+        以及与GameState相同的next_player legal_points is_over 所以可以交给scoring和symmetry中的函数
+"""
+
+
+class SearchBoard():
+    def __init__(self, num_rows, num_cols, win_length=None, next_player=Player.black):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.win_length = win_length
+        self.next_player = next_player
+
+        table = line_table(num_rows, num_cols, win_length)
+        # 按行优先排列的所有点 以及点到格子序号的索引
+        self._points = point_table(num_rows, num_cols)
+        self._index = {point: i for i, point in enumerate(self._points)}
+        # 每格经过的连线编号和每条连线的长度
+        self._cell_lines = tuple(table.point_lines.get(point, ()) for point in self._points)
+        self._line_lengths = tuple(len(line) for line in table.lines)
+
+        self._cells = [None] * len(self._points)
+        self._counts = {
+            Player.black: [0] * len(table.lines),
+            Player.white: [0] * len(table.lines),
+        }
+        self._stones = {Player.black: 0, Player.white: 0}
+        self._empty = (1 << len(self._points)) - 1
+        # 落子的格子序号 悔棋时依次弹出
+        self._history = []
+        self.winner = None
+        # 胜负是在第几手产生的
+        self._winner_ply = None
+
+    # 由GameState复制出一个搜索棋盘
+    @classmethod
+    def from_game_state(cls, game_state):
+        board = game_state.board
+        position = cls(board.num_rows, board.num_cols, getattr(board, 'win_length', None))
+        for point in position._points:
+            stone = board.get(point)
+            if stone is not None:
+                position._place(position._index[point], stone)
+        position.next_player = game_state.next_player
+        # 起始局面的子不能悔掉
+        position._history = []
+        if position._winner_ply is not None:
+            position._winner_ply = 0
+        return position
+
+    def _place(self, index, player):
+        self._cells[index] = player
+        self._stones[player] |= 1 << index
+        self._empty &= ~(1 << index)
+        counts = self._counts[player]
+        lengths = self._line_lengths
+        for line in self._cell_lines[index]:
+            counts[line] += 1
+            if counts[line] == lengths[line] and self.winner is None:
+                self.winner = player
+                self._winner_ply = len(self._history) + 1
+        self._history.append(index)
+
+    # 轮到的一方在point落子
+    def play(self, point):
+        index = self._index[point]
+        assert self._cells[index] is None
+        self._place(index, self.next_player)
+        self.next_player = self.next_player.other
+
+    # 悔掉最后一手 返回悔掉的点
+    def undo(self):
+        if self._winner_ply == len(self._history):
+            self.winner = None
+            self._winner_ply = None
+        index = self._history.pop()
+        player = self._cells[index]
+        self._cells[index] = None
+        self._stones[player] &= ~(1 << index)
+        self._empty |= 1 << index
+        counts = self._counts[player]
+        for line in self._cell_lines[index]:
+            counts[line] -= 1
+        self.next_player = player
+        return self._points[index]
+
+    def is_on_grid(self, point):
+        return point in self._index
+
+    def get(self, point):
+        return self._cells[self._index[point]]
+
+    # 与symmetry.board_cells相同的格子元组
+    def cells(self):
+        return tuple(0 if stone is None else stone.value for stone in self._cells)
+
+    # 某一方在每条连线上的子数 按连线表的顺序
+    def line_counts(self, player):
+        return self._counts[player]
+
+    def evaluate_win(self):
+        return self.winner
+
+    def position_key(self):
+        return self._stones[Player.black], self._stones[Player.white]
+
+    # 所有空点 按行优先的顺序
+    def empty_points(self):
+        empty = self._empty
+        points = []
+        while empty:
+            low = empty & -empty
+            points.append(self._points[low.bit_length() - 1])
+            empty ^= low
+        return points
+
+    def is_over(self):
+        return self.winner is not None or not self._empty
+
+    def legal_points(self):
+        if self.winner is not None:
+            return []
+        return self.empty_points()
+
+    # 已经下了几手（不含起始局面的子）
+    @property
+    def ply(self):
+        return len(self._history)
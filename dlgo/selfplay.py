@@ -0,0 +1,152 @@
+"""
+    无界面的批量自对弈
+    在进程池里让两个Agent下N盘棋 每盘有自己的随机种子 结果边下边返回（流式） 可以在出现目标事件时提前停止
+    用法：
+        stats = SelfPlayStats()
+        for record in play_games(RandomBot(), Smart_Cirno(), 10000, processes=8):
+            stats.add(record)
+        print(stats.summary())
+    默认每盘棋都用传入的机器人的新副本 不带着前几盘的置换表或搜索树 所以同一个种子总能复现同一盘棋
+    fresh_agents=False时每个进程一直用同一个机器人 后面的对局可以用前面攒下的置换表 快得多 但种子不再能复现对局
+    record_moves为True时每盘的落子也随结果返回（GameRecord.game） 可以用dlgo.game_file.GameWriter存下来
+"""
+
+import copy
+import importlib
+import multiprocessing
+import random
+from collections import namedtuple
+
+from dlgo.game_loop import run_game
+from dlgo.gotypes import Player
+
+__all__ = [
+    'GameRecord',
+    'SelfPlayStats',
+    'play_game',
+    'play_games',
+]
+
+
+# 一盘棋的结果 winner为None表示平局 black_seconds/white_seconds是双方各自的思考总时间
+# game是这盘棋的dlgo.game_file.RecordedGame 只在record_moves时才有 否则为None
+class GameRecord(namedtuple('GameRecord', 'game_id seed winner num_moves black_seconds white_seconds game',
+                            defaults=(None,))):
+    pass
+
+
+# 下一盘棋 engine是棋盘引擎的模块名（goboard_slow或goboard_fast）
+def play_game(black_agent, white_agent, board_size=3, seed=None, engine='goboard_slow', win_length=None,
+              game_id=0, record_moves=False):
+    goboard = importlib.import_module('dlgo.' + engine)
+    random.seed(seed)
+    game = goboard.GameState.new_game(board_size, win_length=win_length)
+    seconds = {Player.black: 0.0, Player.white: 0.0}
+    num_moves = [0]
+    moves = []
+
+    def on_move(game_state, move, move_seconds):
+        seconds[game_state.next_player] += move_seconds
+        if move.is_play:
+            num_moves[0] += 1
+        if record_moves:
+            moves.append(move)
+
+    game = run_game(game, {Player.black: black_agent, Player.white: white_agent}, on_move=on_move)
+
+    winner = game.winning_player()
+    recorded = None
+    if record_moves:
+        from dlgo.game_file import RecordedGame
+        board = game.board
+        recorded = RecordedGame.from_moves(board.num_rows, board.num_cols, board.win_length, winner, moves)
+    return GameRecord(game_id, seed, winner, num_moves[0], seconds[Player.black], seconds[Player.white], recorded)
+
+
+# 子进程里的对局设置 由进程池的initializer放进来 每个子进程只反序列化一次机器人
+_worker_setup = None
+
+
+def _init_worker(setup):
+    global _worker_setup
+    _worker_setup = setup
+
+
+# 每盘复制一次机器人 一起复制 执黑执白是同一个对象时副本也是同一个
+def _play_task(task):
+    game_id, seed = task
+    agents, board_size, engine, win_length, record_moves, fresh_agents = _worker_setup
+    black_agent, white_agent = copy.deepcopy(agents) if fresh_agents else agents
+    return play_game(black_agent, white_agent, board_size, seed, engine, win_length, game_id, record_moves)
+
+
+# 下num_games盘棋 逐盘产出GameRecord（多进程时按完成顺序）
+# seeds为每盘的种子序列 不给则第i盘用base_seed + i
+# stop_when是一个接收GameRecord的函数 返回True时停止并不再产出
+# processes为1时在当前进程里下 方便调试
+# record_moves和fresh_agents见模块说明
+def play_games(black_agent, white_agent, num_games, processes=None, board_size=3, engine='goboard_slow',
+               win_length=None, base_seed=0, seeds=None, stop_when=None, chunksize=16, record_moves=False,
+               fresh_agents=True):
+    if seeds is None:
+        seeds = range(base_seed, base_seed + num_games)
+    tasks = zip(range(num_games), seeds)
+    setup = ((black_agent, white_agent), board_size, engine, win_length, record_moves, fresh_agents)
+
+    if processes == 1:
+        _init_worker(setup)
+        for task in tasks:
+            record = _play_task(task)
+            yield record
+            if stop_when is not None and stop_when(record):
+                return
+        return
+
+    pool = multiprocessing.Pool(processes, initializer=_init_worker, initargs=(setup,))
+    try:
+        for record in pool.imap_unordered(_play_task, tasks, chunksize):
+            yield record
+            if stop_when is not None and stop_when(record):
+                return
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+# 流式汇总 不保存每盘的记录
+class SelfPlayStats:
+    def __init__(self):
+        self.games = 0
+        self.black_wins = 0
+        self.white_wins = 0
+        self.draws = 0
+        self.total_moves = 0
+        self.max_moves = 0
+        self.black_seconds = 0.0
+        self.white_seconds = 0.0
+
+    def add(self, record):
+        self.games += 1
+        if record.winner == Player.black:
+            self.black_wins += 1
+        elif record.winner == Player.white:
+            self.white_wins += 1
+        else:
+            self.draws += 1
+        self.total_moves += record.num_moves
+        self.max_moves = max(self.max_moves, record.num_moves)
+        self.black_seconds += record.black_seconds
+        self.white_seconds += record.white_seconds
+
+    def summary(self):
+        seconds = self.black_seconds + self.white_seconds
+        return {
+            'games': self.games,
+            'black_wins': self.black_wins,
+            'white_wins': self.white_wins,
+            'draws': self.draws,
+            'mean_moves': self.total_moves / self.games if self.games else 0.0,
+            'max_moves': self.max_moves,
+            'seconds_per_move': seconds / self.total_moves if self.total_moves else 0.0,
+        }
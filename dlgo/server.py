@@ -0,0 +1,275 @@
+"""
+    多局并发的对局服务器
+    在本机的TCP端口或Unix套接字上监听 一个进程同时托管任意多盘棋
+    协议：每行一个JSON请求 服务器对每个请求回一行JSON
+        {"cmd": "new_game", "board_size": 3, "win_length": null, "engine": "goboard_fast", "bot": "cirno"}
+        {"cmd": "play", "game_id": "1", "move": "B2"}        move也可以是"pass"或"resign"
+        {"cmd": "bot_move", "game_id": "1"}                  由机器人替轮到的一方下一步
+        {"cmd": "state", "game_id": "1"}
+        {"cmd": "close", "game_id": "1"}
+    成功时回复{"ok": true, ...} 出错时回复{"ok": false, "error": "..."} 连接不断开
+    机器人的计算放在执行器（默认是进程池）里 不阻塞事件循环 超过move_timeout秒没算完时回复出错
+    棋盘最大MAX_BOARD_SIZE x MAX_BOARD_SIZE 穷举整盘棋的机器人（cirno）只能用在不超过MAX_EXHAUSTIVE_POINTS个点的棋盘上
+    多个请求在等同一个局面（同一个机器人 同样的棋盘和轮到的一方）时只算一次 结果共用
+    用法：
+        python -m dlgo.server --port 5555
+        python -m dlgo.server --unix /tmp/dlgo.sock
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import importlib
+import itertools
+import json
+import logging
+
+from dlgo.agent.helpers import selected_move
+from dlgo.agent.registry import BOTS
+from dlgo.agent.registry import EXHAUSTIVE_BOTS
+from dlgo.agent.registry import MAX_EXHAUSTIVE_POINTS
+from dlgo.agent.registry import make_bot
+from dlgo.game_loop import move_text
+from dlgo.game_loop import parse_move
+from dlgo.gotypes import Player
+from dlgo.gotypes import point_table
+
+__all__ = [
+    'GameServer',
+    'main',
+]
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ('goboard_slow', 'goboard_fast')
+MAX_BOARD_SIZE = 19
+
+# 执行器子进程里的机器人 每个名字一个 跨请求保留（置换表等）
+_worker_agents = {}
+
+
+def _bot_move(bot, game_state):
+    agent = _worker_agents.get(bot)
+    if agent is None:
+        agent = _worker_agents[bot] = make_bot(bot)
+    return selected_move(agent.select_move(game_state))
+
+
+class RequestError(Exception):
+    pass
+
+
+# 一盘棋 bot是这盘棋用的机器人的名字
+class Session():
+    def __init__(self, game_id, game_state, engine, bot):
+        self.game_id = game_id
+        self.game_state = game_state
+        self.engine = engine
+        self.bot = bot
+        # 同一盘棋的请求依次处理
+        self.lock = asyncio.Lock()
+
+
+class GameServer():
+    # executor为None时用max_workers个子进程的进程池 move_timeout是机器人每步的时间上限（秒）
+    def __init__(self, executor=None, max_workers=None, move_timeout=60.0):
+        if executor is None:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers)
+        self.executor = executor
+        self.move_timeout = move_timeout
+        self.sessions = {}
+        self._ids = itertools.count(1)
+        # 正在计算的局面 键到asyncio.Future
+        self._pending = {}
+        # 被合并掉的计算次数
+        self.deduplicated = 0
+
+    async def serve_tcp(self, host='127.0.0.1', port=5555):
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    async def serve_unix(self, path):
+        return await asyncio.start_unix_server(self.handle_client, path)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self.handle_line(line)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_line(self, line):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError('request must be a JSON object')
+            response = await self.dispatch(request)
+        except (ValueError, RequestError) as e:
+            return {'ok': False, 'error': str(e)}
+        except Exception:
+            logger.exception('request failed: %r', line)
+            return {'ok': False, 'error': 'internal error'}
+        response['ok'] = True
+        return response
+
+    async def dispatch(self, request):
+        cmd = request.get('cmd')
+        if cmd == 'new_game':
+            return self.new_game(request)
+        session = self._session(request)
+        async with session.lock:
+            if cmd == 'play':
+                if not isinstance(request.get('move'), str):
+                    raise RequestError('move must be a string')
+                self._apply(session, parse_move(request['move']))
+            elif cmd == 'bot_move':
+                move = await self.bot_move(session)
+                self._apply(session, move)
+                return {'move': move_text(move), 'state': state_dict(session)}
+            elif cmd == 'state':
+                pass
+            elif cmd == 'close':
+                del self.sessions[session.game_id]
+                return {'game_id': session.game_id}
+            else:
+                raise RequestError('unknown command: %r' % (cmd,))
+            return {'state': state_dict(session)}
+
+    def new_game(self, request):
+        num_rows, num_cols = _board_size(request.get('board_size', 3))
+        win_length = request.get('win_length')
+        engine = request.get('engine', 'goboard_fast')
+        bot = request.get('bot', 'cirno')
+        if win_length is not None and not (type(win_length) is int and 1 <= win_length <= max(num_rows, num_cols)):
+            raise RequestError('win_length must be null or an integer between 1 and %d' % max(num_rows, num_cols))
+        if engine not in ENGINES:
+            raise RequestError('unknown engine: %r' % (engine,))
+        if bot not in BOTS:
+            raise RequestError('unknown bot: %r' % (bot,))
+        if bot in EXHAUSTIVE_BOTS and num_rows * num_cols > MAX_EXHAUSTIVE_POINTS:
+            raise RequestError('bot %r only supports boards up to %d points, use mcts or threat'
+                               % (bot, MAX_EXHAUSTIVE_POINTS))
+        board_size = (num_rows, num_cols)
+        goboard = importlib.import_module('dlgo.' + engine)
+        # 服务器里同时开着很多盘棋 用紧凑棋谱
+        game_state = goboard.GameState.new_game(board_size, win_length=win_length, compact_history=True)
+
+        game_id = str(next(self._ids))
+        session = Session(game_id, game_state, engine, bot)
+        self.sessions[game_id] = session
+        return {'game_id': game_id, 'state': state_dict(session)}
+
+    def _session(self, request):
+        session = self.sessions.get(str(request.get('game_id')))
+        if session is None:
+            raise RequestError('unknown game_id: %r' % (request.get('game_id'),))
+        return session
+
+    @classmethod
+    def _apply(cls, session, move):
+        game_state = session.game_state
+        if move.is_play and not game_state.board.is_on_grid(move.point):
+            raise RequestError('move is off the board')
+        if not game_state.is_valid_move(move):
+            raise RequestError('illegal move')
+        session.game_state = game_state.apply_move(move)
+
+    # 在执行器里算机器人的落子 同一局面已经在算时等那一次的结果
+    async def bot_move(self, session):
+        game_state = session.game_state
+        if game_state.is_over():
+            raise RequestError('game is over')
+        board = game_state.board
+        key = (session.bot, session.engine, board.num_rows, board.num_cols, board.win_length,
+               game_state.next_player, board.position_key())
+        future = self._pending.get(key)
+        if future is not None:
+            self.deduplicated += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, _bot_move, session.bot, game_state)
+            self._pending[key] = future
+            future.add_done_callback(lambda _: self._pending.pop(key, None))
+        # shield：一个客户端断开或超时不会取消别人也在等的计算
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.move_timeout)
+        except asyncio.TimeoutError:
+            raise RequestError('bot move timed out after %gs' % self.move_timeout)
+
+
+# 请求中的board_size 一个整数或[行数, 列数] 返回（行数, 列数）
+def _board_size(board_size):
+    if type(board_size) is int:
+        board_size = (board_size, board_size)
+    elif isinstance(board_size, list) and len(board_size) == 2 and all(type(n) is int for n in board_size):
+        board_size = tuple(board_size)
+    else:
+        raise RequestError('board_size must be an integer or [rows, cols]')
+    if not all(1 <= n <= MAX_BOARD_SIZE for n in board_size):
+        raise RequestError('board_size must be between 1 and %d' % MAX_BOARD_SIZE)
+    return board_size
+
+
+# 一盘棋的状态 board从第1行到最后一行 每行一个字符串 x黑 o白 .空
+def state_dict(session):
+    game_state = session.game_state
+    board = game_state.board
+    chars = {None: '.', Player.black: 'x', Player.white: 'o'}
+    points = point_table(board.num_rows, board.num_cols)
+    rows = []
+    for start in range(0, len(points), board.num_cols):
+        rows.append(''.join(chars[board.get(point)] for point in points[start:start + board.num_cols]))
+    winner = None
+    if game_state.is_over():
+        result = game_state.winning_player()
+        winner = 'draw' if result is None else result.name
+    return {
+        'game_id': session.game_id,
+        'board': rows,
+        'next_player': game_state.next_player.name,
+        'last_move': move_text(game_state.last_move),
+        'over': game_state.is_over(),
+        'winner': winner,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='serve many games over a JSON line protocol')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5555)
+    parser.add_argument('--unix', help='listen on this Unix socket path instead of TCP')
+    parser.add_argument('--workers', type=int, help='bot worker processes (default: CPU count)')
+    parser.add_argument('--move-timeout', type=float, default=60.0, help='seconds a bot may think per move')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    server = GameServer(max_workers=args.workers, move_timeout=args.move_timeout)
+
+    async def run():
+        if args.unix:
+            listener = await server.serve_unix(args.unix)
+        else:
+            listener = await server.serve_tcp(args.host, args.port)
+        logger.info('listening on %s', ', '.join(str(sock.getsockname()) for sock in listener.sockets))
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
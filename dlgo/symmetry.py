@@ -0,0 +1,134 @@
+from dlgo.gotypes import Point
+from dlgo.gotypes import point_table
+
+__all__ = [
+    'board_cells',
+    'canonical_form',
+    'inverse_transform',
+    'symmetric_transforms',
+    'transform_point',
+    'unique_candidates',
+]
+
+"""
+    解读：
+        方形棋盘有8种对称（旋转0/90/180/270度 以及它们再镜像 即二面体群D4）
+        长方形棋盘只剩4种（不动 旋转180度 上下翻转 左右翻转）
+        一个变换用(转置, 上下翻转, 左右翻转)三个布尔值表示 先转置再翻转
+        canonical_form把棋盘在所有对称下的样子中取最小的一个作为标准形
+            同一局面的各种旋转镜像得到同一个标准形 置换表只需存一份
+            同时返回所用的变换 以便把标准形下的落子映射回真实的朝向
+"""
+
+# 每种棋盘大小的变换表 键是（行数, 列数）
+_transform_tables = {}
+
+
+# 某种棋盘大小下所有保持棋盘形状的变换 恒等变换总在第一个
+def symmetric_transforms(num_rows, num_cols):
+    return _transform_table(num_rows, num_cols)[0]
+
+
+# 返回（所有变换, 每个变换对应的格子置换）
+def _transform_table(num_rows, num_cols):
+    table = _transform_tables.get((num_rows, num_cols))
+    if table is not None:
+        return table
+
+    transforms = []
+    for transpose in (False, True):
+        # 转置只对方形棋盘保持形状
+        if transpose and num_rows != num_cols:
+            continue
+        for flip_rows in (False, True):
+            for flip_cols in (False, True):
+                transforms.append((transpose, flip_rows, flip_cols))
+
+    # 每个变换对应的格子置换：变换后第j格的子来自原来的第permutations[t][j]格
+    permutations = {}
+    for transform in transforms:
+        permutation = [0] * (num_rows * num_cols)
+        for r in range(1, num_rows + 1):
+            for c in range(1, num_cols + 1):
+                point = transform_point(Point(row=r, col=c), transform, num_rows, num_cols)
+                permutation[(point.row - 1) * num_cols + (point.col - 1)] = (r - 1) * num_cols + (c - 1)
+        permutations[transform] = tuple(permutation)
+
+    table = (tuple(transforms), permutations)
+    _transform_tables[(num_rows, num_cols)] = table
+    return table
+
+
+# 把一个点按变换映射到新的位置
+def transform_point(point, transform, num_rows, num_cols):
+    transpose, flip_rows, flip_cols = transform
+    row, col = point.row, point.col
+    if transpose:
+        row, col = col, row
+    if flip_rows:
+        row = num_rows + 1 - row
+    if flip_cols:
+        col = num_cols + 1 - col
+    return point_table(num_rows, num_cols)[(row - 1) * num_cols + (col - 1)]
+
+
+# 逆变换 翻转是自身的逆 先转置后翻转的逆是先翻转另一个轴后转置 即交换两个翻转再转置
+def inverse_transform(transform):
+    transpose, flip_rows, flip_cols = transform
+    if transpose:
+        return transpose, flip_cols, flip_rows
+    return transform
+
+
+# 棋盘内容 按行优先排成元组 空为0 否则为阵营的值
+def board_cells(board):
+    # 自带格子元组的棋盘（如SearchBoard）直接用它自己的
+    board_cells_method = getattr(board, 'cells', None)
+    if board_cells_method is not None:
+        return board_cells_method()
+    cells = []
+    for r in range(1, board.num_rows + 1):
+        for c in range(1, board.num_cols + 1):
+            stone = board.get(Point(row=r, col=c))
+            cells.append(0 if stone is None else stone.value)
+    return tuple(cells)
+
+
+def _permute(cells, permutation):
+    return tuple(cells[index] for index in permutation)
+
+
+# 标准形 返回（标准形的格子元组, 把棋盘变成标准形所用的变换）
+def canonical_form(board):
+    transforms, permutations = _transform_table(board.num_rows, board.num_cols)
+    cells = board_cells(board)
+    best_cells = cells
+    best_transform = transforms[0]
+    for transform in transforms[1:]:
+        transformed = _permute(cells, permutations[transform])
+        if transformed < best_cells:
+            best_cells = transformed
+            best_transform = transform
+    return best_cells, best_transform
+
+
+# 去掉对称等价的候选点 只保留每组中的第一个
+# 棋盘在某个变换下不变时 该变换把候选点映射到的点与原候选点等价
+def unique_candidates(board, candidates):
+    transforms, permutations = _transform_table(board.num_rows, board.num_cols)
+    cells = board_cells(board)
+    stabilizer = [transform for transform in transforms[1:]
+                  if _permute(cells, permutations[transform]) == cells]
+    if not stabilizer:
+        return list(candidates)
+
+    unique = []
+    seen = set()
+    for point in candidates:
+        if point in seen:
+            continue
+        unique.append(point)
+        seen.add(point)
+        for transform in stabilizer:
+            seen.add(transform_point(point, transform, board.num_rows, board.num_cols))
+    return unique
@@ -0,0 +1,155 @@
+"""
+    残局库（tablebase）
+    离线把小棋盘上每一个可达局面的胜负和所有最佳落子算出来 写进一个定长记录的二进制文件
+    TablebaseAgent用mmap打开这个文件 每次落子只需一次下标查找
+
+    文件格式：
+        文件头16字节：魔数b"CIRNOTB1" 行数 列数 连子数（0表示整行整列的原规则） 每条记录的字节数 4字节保留
+        之后是3**(行数*列数)条记录 局面按行优先把每格（空0 黑1 白2）当作三进制数的各位 第i格的权重是3**i
+        每条记录：1字节结果（0不可达 1黑胜 2白胜 3平局） 之后是最佳落子的位图（第i位为1表示第i格是最佳落子之一）
+    用法：python -m dlgo.tablebase 输出文件 [棋盘大小] [连子数]
+"""
+
+import struct
+import sys
+
+from dlgo.gotypes import Player
+from dlgo.gotypes import Point
+from dlgo.scoring import line_table
+
+__all__ = [
+    'BLACK_WINS',
+    'DRAW',
+    'UNREACHABLE',
+    'WHITE_WINS',
+    'generate_tablebase',
+    'position_index',
+    'read_header',
+    'side_to_move',
+]
+
+MAGIC = b'CIRNOTB1'
+HEADER = struct.Struct('<8sBBBB4x')
+
+# 记录中的结果
+UNREACHABLE = 0
+BLACK_WINS = 1
+WHITE_WINS = 2
+DRAW = 3
+
+
+# 每条记录的字节数 结果1字节 加上能放下每格一位的位图
+def record_size(num_cells):
+    return 1 + (num_cells + 7) // 8
+
+
+# 局面在文件中的下标
+def position_index(board):
+    index = 0
+    weight = 1
+    for r in range(1, board.num_rows + 1):
+        for c in range(1, board.num_cols + 1):
+            stone = board.get(Point(row=r, col=c))
+            if stone is not None:
+                index += weight * stone.value
+            weight *= 3
+    return index
+
+
+# 表里的局面都是黑先 双方轮流落子下出来的 所以该谁下由双方的子数决定
+# 子数对不上（例如中途有人停一手）时返回None 这样的局面不在表里
+def side_to_move(board):
+    counts = {Player.black: 0, Player.white: 0}
+    for r in range(1, board.num_rows + 1):
+        for c in range(1, board.num_cols + 1):
+            stone = board.get(Point(row=r, col=c))
+            if stone is not None:
+                counts[stone] += 1
+    if counts[Player.black] == counts[Player.white]:
+        return Player.black
+    if counts[Player.black] == counts[Player.white] + 1:
+        return Player.white
+    return None
+
+
+# 读文件头 返回（行数, 列数, 连子数, 每条记录的字节数）
+def read_header(buffer):
+    magic, num_rows, num_cols, win_length, size = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError('not a tablebase file')
+    return num_rows, num_cols, (win_length or None), size
+
+
+# 从空棋盘出发穷举所有可达局面 返回记录组成的bytearray
+def _solve_all(num_rows, num_cols, win_length):
+    num_cells = num_rows * num_cols
+    size = record_size(num_cells)
+    table = line_table(num_rows, num_cols, win_length)
+    # 把point换成格子序号
+    lines = [tuple((p.row - 1) * num_cols + (p.col - 1) for p in line) for line in table.lines]
+    cell_lines = [()] * num_cells
+    for point, indexes in table.point_lines.items():
+        cell_lines[(point.row - 1) * num_cols + (point.col - 1)] = tuple(lines[i] for i in indexes)
+    weights = [3 ** i for i in range(num_cells)]
+    records = bytearray(3 ** num_cells * size)
+    cells = [0] * num_cells
+
+    # 返回该局面的结果 并把结果和最佳落子写进records
+    def solve(index, to_move):
+        offset = index * size
+        if records[offset]:
+            return records[offset]
+
+        other = 3 - to_move
+        results = []
+        for i in range(num_cells):
+            if cells[i]:
+                continue
+            cells[i] = to_move
+            child = index + weights[i] * to_move
+            if any(all(cells[j] == to_move for j in line) for line in cell_lines[i]):
+                # 这一手连成了线 子局面记为已分胜负的终局
+                records[child * size] = to_move
+                result = to_move
+            else:
+                result = solve(child, other)
+            cells[i] = 0
+            results.append((i, result))
+
+        if not results:
+            records[offset] = DRAW
+            return DRAW
+        if any(result == to_move for _, result in results):
+            best = to_move
+        elif any(result == DRAW for _, result in results):
+            best = DRAW
+        else:
+            best = other
+
+        mask = 0
+        for i, result in results:
+            if result == best:
+                mask |= 1 << i
+        records[offset] = best
+        records[offset + 1:offset + size] = mask.to_bytes(size - 1, 'little')
+        return best
+
+    solve(0, 1)
+    return records
+
+
+# 生成残局库文件 3x3以外的棋盘记录数按3**格子数增长 只适合很小的棋盘
+def generate_tablebase(path, board_size=3, win_length=None):
+    if isinstance(board_size, int):
+        board_size = (board_size, board_size)
+    num_rows, num_cols = board_size
+    records = _solve_all(num_rows, num_cols, win_length)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, num_rows, num_cols, win_length or 0, record_size(num_rows * num_cols)))
+        f.write(records)
+
+
+if __name__ == '__main__':
+    generate_tablebase(sys.argv[1],
+                       int(sys.argv[2]) if len(sys.argv) > 2 else 3,
+                       int(sys.argv[3]) if len(sys.argv) > 3 else None)
@@ -1,8 +1,3 @@
-import platform
-import subprocess
-
-import numpy as np
-
 from dlgo import gotypes
 
 COLS = 'ABCDEFGHJKLMNOPQRST'
@@ -52,6 +47,9 @@ def coords_from_point(point):
     )
 
 def clear_screen():
+    # 只有清屏时才用到 不在导入时加载
+    import platform
+    import subprocess
     # see https://stackoverflow.com/a/23075152/323316
     if platform.system() == "Windows":
         subprocess.Popen("cls", shell=True).communicate()
@@ -64,6 +62,8 @@ def clear_screen():
 # readers in early chapters.
 class MoveAge():
     def __init__(self, board):
+        # numpy只有这里用到 导入dlgo.utils时不加载
+        import numpy as np
         self.move_ages = - np.ones((board.num_rows, board.num_cols))
 
     def get(self, row, col):
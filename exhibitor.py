@@ -1,10 +1,15 @@
+import threading
+
 from dlgo.gotypes import Point
 from dlgo.gotypes import Player
 
 from dlgo import gotypes
 from dlgo.gotypes import Point
 from dlgo.goboard_slow import Move
+from dlgo.gotypes import point_table
 from dlgo.agent import helpers
+from dlgo.game_loop import Frontend
+from dlgo.utils import print_move
 
 
 class Exhibitor:
@@ -30,6 +35,16 @@ class Exhibitor:
         # 模式
         self.mode = mode
 
+        # 增量绘制用的缓存 第一次绘制时生成
+        # 不含棋子的整个画面
+        self.background = None
+        # 每一方的棋子图 大小和一格相同 带着格子的底色
+        self.sprites = {}
+        # 每一格在屏幕上的范围 按point_table的顺序
+        self.cell_rects = None
+        # 上一帧每一格画的是什么（None或阵营） 还没画过整个画面时为None
+        self.shown = None
+
     # 初始化展示器
     def __init_exhibitor(self):
         # 初始化框架
@@ -49,6 +64,12 @@ class Exhibitor:
         # 设定时间频率
         self.clock = pygame.time.Clock()
 
+        # 机器人在后台线程想好之后发出的事件
+        if hasattr(pygame.event, 'custom_type'):
+            self.bot_move_event = pygame.event.custom_type()
+        else:
+            self.bot_move_event = pygame.USEREVENT
+
         # 定义点类
         class Position:
             def __init__(self, exhibitor, row, col, interspace=5):
@@ -66,24 +87,31 @@ class Exhibitor:
                 self.left = self.col * self.cell_width
                 self.top = self.row * self.cell_height
 
-            def draw_point(self):
-                pygame.draw.rect(self.exhibitor.window, self.exhibitor.board_color,
+            # 本格在屏幕上的范围
+            def rect(self):
+                return pygame.Rect(self.left, self.top, self.cell_width - 1, self.cell_height - 1)
+
+            # surface默认是窗口 也可以画在缓存的画面上
+            def draw_point(self, surface=None):
+                surface = self.exhibitor.window if surface is None else surface
+                pygame.draw.rect(surface, self.exhibitor.board_color,
                                  (self.left, self.top, self.cell_width - 1, self.cell_height - 1))
 
-            def draw_stone(self, faction):
+            def draw_stone(self, faction, surface=None):
+                surface = self.exhibitor.window if surface is None else surface
                 if faction == Player.black:
-                    pygame.draw.circle(self.exhibitor.window, (0, 0, 0),
+                    pygame.draw.circle(surface, (0, 0, 0),
                                        (self.left + (self.cell_width - 1) / 2, self.top + (self.cell_width - 1) / 2),
                                        (self.cell_width - 1) / 2, width=int(self.cell_width) // 10)
                 elif faction == Player.white:
-                    pygame.draw.line(self.exhibitor.window, (0, 0, 0),
+                    pygame.draw.line(surface, (0, 0, 0),
                                      start_pos=(self.left + self.cell_width / 10,
                                                 self.top + self.cell_width / 10),
                                      end_pos=(self.left + self.cell_width - self.cell_width / 10,
                                               self.top + self.cell_width - self.cell_width / 10),
                                      width=int(self.cell_width) // 10)
 
-                    pygame.draw.line(self.exhibitor.window, (0, 0, 0),
+                    pygame.draw.line(surface, (0, 0, 0),
                                      start_pos=(self.left + self.cell_width / 10,
                                                 self.top + self.cell_width - self.cell_width / 10),
                                      end_pos=(self.left + self.cell_width - self.cell_width / 10,
@@ -98,20 +126,7 @@ class Exhibitor:
 
     def display(self, game, stone):
         # 绘图内容
-        pass
-
-        # win_event = True
-
-        """
-            画方格世界
-        """
-        self.draw_game(game)
-
-        """
-            画状态栏
-        """
-        # 让渡控制权
-        self.pygame.display.flip()
+        self.render(game)
 
         # 设置帧率
         self.clock.tick(60)
@@ -131,71 +146,146 @@ class Exhibitor:
 
         return player_cmd
 
-    def draw_game(self, game):
-        """
-            定义绘图函数
-        """
-
-        # 画棋盘
-        def draw_board():
-            board_size = game.board.num_cols
-            for row in range(board_size):
-                for col in range(board_size):
-                    self.Position(self, row=row + 1, col=col + 1).draw_point()
-
-        # 画棋子
-        def draw_stone():
-            board_size = game.board.num_cols
-            for row in range(board_size):
-                for col in range(board_size):
-                    stone = game.board.get(Point(row=row + 1, col=col + 1))
-                    # print(stone)
-                    if stone is not None:
-                        self.Position(self, row=row + 1, col=col + 1).draw_stone(stone)
-
-        """
-            画图执行
-        """
-
-        # 渲染
-        # 画背景
-        self.pygame.draw.rect(self.window, self.bg_color, (0, 0, self.win_size[0], self.win_size[1]))
+    # 只画一帧 不等帧率 也不读玩家操作
+    # 第一帧画整个画面 之后只重画和上一帧不同的格子
+    def render(self, game):
+        if self.shown is None:
+            self.draw_game(game)
+            # 让渡控制权
+            self.pygame.display.flip()
+        else:
+            rects = self.draw_changes(game)
+            if rects:
+                self.pygame.display.update(rects)
+        # 处理窗口事件 避免机器人连续落子时窗口失去响应
+        self.pygame.event.pump()
+
+    # 下一帧重画整个画面（例如窗口被别的窗口盖住之后）
+    def invalidate(self):
+        self.shown = None
+
+    # 每一格现在的内容 按point_table的顺序
+    @classmethod
+    def cells(cls, game):
+        board = game.board
+        return [board.get(point) for point in point_table(board.num_rows, board.num_cols)]
+
+    # 画不含棋子的画面：背景 棋盘边框 空的格子
+    def draw_background(self):
+        background = self.pygame.Surface(self.window.get_size())
+        background.fill(self.bg_color)
         self.pygame.draw.rect \
-            (self.window, self.board_color,
+            (background, self.board_color,
              (0, 0, self.world_win_size[0] + 2 * self.block_size, self.world_win_size[1] + 2 * self.block_size))
         self.pygame.draw. \
-            rect(self.window, (0, 0, 0),
+            rect(background, (0, 0, 0),
                  (self.block_size - 1, self.block_size - 1, self.world_win_size[0] + 1,
                   self.world_win_size[1] + 1))
+        for row in range(self.board_size):
+            for col in range(self.board_size):
+                self.Position(self, row=row + 1, col=col + 1).draw_point(background)
+        return background
+
+    # 预先画好一方的棋子 画在(0, 0)格的位置上 和格子一样大
+    def draw_sprite(self, faction):
+        origin = self.Position(self, row=0, col=0)
+        sprite = self.pygame.Surface(origin.rect().size)
+        sprite.fill(self.board_color)
+        origin.draw_stone(faction, sprite)
+        return sprite
 
-        # 画棋盘
-        draw_board()
+    def draw_game(self, game):
+        if self.background is None:
+            self.background = self.draw_background()
+            self.sprites = {faction: self.draw_sprite(faction) for faction in (Player.black, Player.white)}
+            self.cell_rects = [self.Position(self, row=point.row, col=point.col).rect()
+                               for point in point_table(self.board_size, self.board_size)]
 
-        # 画棋子
-        draw_stone()
+        # 画背景和棋盘
+        self.window.blit(self.background, (0, 0))
 
+        # 画棋子
+        self.shown = self.cells(game)
+        for rect, stone in zip(self.cell_rects, self.shown):
+            if stone is not None:
+                self.window.blit(self.sprites[stone], rect)
+
+    # 只重画和上一帧不同的格子 返回重画过的范围
+    def draw_changes(self, game):
+        cells = self.cells(game)
+        rects = []
+        for rect, old, new in zip(self.cell_rects, self.shown, cells):
+            if old is new:
+                continue
+            if new is None:
+                # 悔棋或新开一盘 用背景盖住原来的棋子
+                self.window.blit(self.background, rect, rect)
+            else:
+                self.window.blit(self.sprites[new], rect)
+            rects.append(rect)
+        self.shown = cells
+        return rects
+
+    # 等玩家落子 没有事件时阻塞在pygame.event.wait上 等待时不占CPU
+    # 返回落子点 按空格返回"pass" 关掉窗口返回False
     def detect_player_input(self, game):
-        door = True
-        while door and self.gate:
-            # 处理事件
-            for event in self.pygame.event.get():
-                if event.type == self.pygame.QUIT:
-                    self.pygame.quit()
-                    return False
-                # keys = self.pygame.key.get_pressed()
-
-                if event.type == self.pygame.MOUSEBUTTONDOWN:
-                    if self.legal_position(event.pos):
-                        point_position = self.shift_screen_position_to_move(event.pos)
-                        point = Point(row=point_position[1] + 1, col=point_position[0] + 1)
-                        if game.is_valid_move(Move.play(point)):
-                            door = False
-                            return point
-
-                if event.type == self.pygame.KEYDOWN:
-                    if event.key == self.pygame.K_SPACE:
-                        door = False
-                        return "pass"
+        while self.gate:
+            event = self.pygame.event.wait()
+            if self.handle_window_event(event, game):
+                continue
+
+            if event.type == self.pygame.MOUSEBUTTONDOWN:
+                if self.legal_position(event.pos):
+                    point_position = self.shift_screen_position_to_move(event.pos)
+                    point = Point(row=point_position[1] + 1, col=point_position[0] + 1)
+                    if game.is_valid_move(Move.play(point)):
+                        return point
+
+            if event.type == self.pygame.KEYDOWN:
+                if event.key == self.pygame.K_SPACE:
+                    return "pass"
+        return False
+
+    # 处理和对局无关的窗口事件 处理了返回True
+    def handle_window_event(self, event, game):
+        if event.type == self.pygame.QUIT:
+            self.pygame.quit()
+            self.gate = False
+            return True
+        # 窗口被盖住后又露出来 整个重画
+        if event.type == self.pygame.VIDEOEXPOSE:
+            self.invalidate()
+            self.render(game)
+            return True
+        return False
+
+    # 让机器人在后台线程里思考 主线程照常处理窗口事件 想好后由bot_move_event通知
+    # 用线程而不是进程 机器人的置换表等状态留在本进程里 下一步还能用
+    # 思考期间窗口被关掉时 等机器人想完再返回它的落子
+    def think(self, agent, game):
+        result = {}
+        thread = threading.Thread(target=self._think, args=(agent, game, result), daemon=True)
+        thread.start()
+        while self.gate:
+            event = self.pygame.event.wait()
+            if event.type == self.bot_move_event:
+                break
+            self.handle_window_event(event, game)
+        thread.join()
+        if 'error' in result:
+            raise result['error']
+        return result['move']
+
+    def _think(self, agent, game, result):
+        try:
+            result['move'] = agent.select_move(game)
+        except Exception as e:
+            result['error'] = e
+        try:
+            self.pygame.event.post(self.pygame.event.Event(self.bot_move_event))
+        except self.pygame.error:
+            # 窗口已经关了 主线程不再等这个事件
+            pass
 
     def legal_position(self, position):
         return self.board_size * self.block_size + self.block_size > position[0] > self.block_size and \
@@ -208,3 +298,34 @@ class Exhibitor:
     def no_repetitive_stone(self, screen_position, game):
         move_position = self.shift_screen_position_to_move(screen_position)
         return game.board.repetitive_stone(Point(row=move_position[1] + 1, col=move_position[0] + 1))
+
+
+# 接入dlgo.game_loop的pygame前端
+class PygameFrontend(Frontend):
+    def __init__(self, board_size, block_size=50):
+        self.exhibitor = Exhibitor(board_size, block_size, None)
+
+    def show(self, game_state):
+        if self.exhibitor.gate:
+            self.exhibitor.render(game_state)
+
+    def ask_move(self, game_state):
+        point = self.exhibitor.detect_player_input(game_state)
+        if point == "pass":
+            return Move.pass_turn()
+        # 关闭窗口视为认输
+        if not point:
+            return Move.resign()
+        return Move.play(point)
+
+    def think(self, agent, game_state):
+        if not self.exhibitor.gate:
+            return agent.select_move(game_state)
+        return self.exhibitor.think(agent, game_state)
+
+    def show_move(self, player, move):
+        print_move(player, move)
+
+    def game_over(self, game_state):
+        if self.exhibitor.gate:
+            self.exhibitor.render(game_state)
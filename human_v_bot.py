@@ -1,13 +1,12 @@
 from __future__ import print_function
+import sys
 # tag::play_against_your_bot[]
 from dlgo import agent
 from dlgo import goboard_slow as goboard
 from dlgo import gotypes
-from dlgo.utils import print_board, print_move, point_from_coords
-from six.moves import input
 from dlgo.agent.naive import RandomBot
 from dlgo.agent.smart_cirno import Smart_Cirno
-from exhibitor import Exhibitor
+from dlgo.game_loop import NullFrontend, TerminalFrontend, run_game
 
 from dlgo.gotypes import Point
 from dlgo.goboard_slow import Move
@@ -31,9 +30,23 @@ from dlgo.goboard_slow import Move
 """
 
 
+# 生成前端 pygame窗口 终端 或不显示（只能用于机器人对机器人）
+def make_frontend(name, board_size):
+    if name == "pygame":
+        from exhibitor import PygameFrontend
+        return PygameFrontend(board_size, 50)
+    elif name == "terminal":
+        return TerminalFrontend()
+    elif name == "none":
+        return NullFrontend()
+    raise ValueError("unknown frontend: %s" % name)
+
+
 def main():
     # 人对机器 还是 机器对机器
     mode = "b v h"
+    # 前端 可以在命令行指定：pygame terminal none
+    frontend_name = sys.argv[1] if len(sys.argv) > 1 else "pygame"
 
     # 初始化 定义棋盘大小
     board_size = 3
@@ -53,45 +66,19 @@ def main():
         测试用
     """
 
-    # 前端展示器类
-    exhibitor = Exhibitor(board_size, 50, mode)
+    # 前端展示器
+    frontend = make_frontend(frontend_name, board_size)
     # 生成bot对象 可以接收一个棋盘作为输入 输出一个落子方案
     bot = Smart_Cirno()
 
-    # 判断游戏是否结束 否则一直进行轮流落子
-    while not game.is_over():
-        move = None
+    # 每一方由谁来下 None表示人类玩家通过前端输入
+    players = {
+        gotypes.Player.black: None if mode in ("h v b", "h v h") else bot,
+        gotypes.Player.white: None if mode in ("b v h", "h v h") else bot,
+    }
 
-        # 判断这一步由谁下
-        if game.next_player == gotypes.Player.black:
-            if mode == "h v b" or mode == "h v h":
-                # 若由黑棋下 则人类玩家决定这一步下在哪
-                # 人类玩家输入落子点 数据结构是两个字符
-                point = exhibitor.display(game, gotypes.Player.black)
-                if point == "pass":
-                    move = Move(is_pass=True)
-                else:
-                    move = Move.play(point)
-            elif mode == "b v b" or mode == "b v h":
-                # 让机器人下这一步
-                move, estimation = bot.select_move(game)
-                exhibitor.display(game, gotypes.Player.black)
-        else:
-            if mode == "b v b" or mode == "h v b":
-                # 给bot棋盘 bot生成一个动作
-                move, estimation = bot.select_move(game)
-                exhibitor.display(game, gotypes.Player.white)
-            elif mode == "b v h" or mode == "h v h":
-                # 人类玩家输入落子点 数据结构是两个字符
-                point = exhibitor.display(game, gotypes.Player.white)
-                if point == "pass":
-                    move = Move(is_pass=True)
-                else:
-                    move = Move.play(point)
-        # 打印 谁 下了哪步（或干了别的什么）
-        print_move(game.next_player, move)
-        # 将move交给game 应用变化
-        game = game.apply_move(move)
+    # 轮流落子直到游戏结束
+    game = run_game(game, players, frontend)
 
     print(game.winner(), "win this game")
 
@@ -1,96 +1,42 @@
 from __future__ import print_function
-# tag::play_against_your_bot[]
-from dlgo import agent
-from dlgo import goboard_slow as goboard
+import sys
+
 from dlgo import gotypes
-from dlgo.utils import print_board, print_move, point_from_coords
-from six.moves import input
 from dlgo.agent.naive import RandomBot
 from dlgo.agent.smart_cirno import Smart_Cirno
-from exhibitor import Exhibitor
-
-from dlgo.gotypes import Point
-from dlgo.goboard_slow import Move
+from dlgo.selfplay import SelfPlayStats
+from dlgo.selfplay import play_games
 
 """
     解读：
-        game对应棋盘
-            其是一个GameState对象
-            由GameState的类方法new_game()生成
-            其储存
-                一个棋盘 board
-                落子者 next_player
-                移动 last_move
-            其存在以下方法：
-                is_over(): 返回bool值 用于棋局是否结束
-                apply_move(): 输入一个move变量 使棋盘引用move的变化
-        程序运作逻辑
-            程序通过给予move值 game运用move值的方式推进
-            给予move值的可以是bot对象 也可以是人类的键盘输入
-        move是一个动作 其可以是pass 落子 或 认输
+        回归测试 随机机器人执黑 琪露诺执白 在进程池里批量对弈
+        琪露诺不应该输 一旦黑棋赢了就立即停止并报告那一盘的种子
+        每盘都用新的机器人 所以play_game(RandomBot(), Smart_Cirno(), seed=种子)能复现那一盘
+        （用置换表文件时除外：文件里已有的局面会影响琪露诺的选择）
+        用法：python test.py [盘数] [进程数] [置换表文件]
+        给出置换表文件时琪露诺的置换表存在这个SQLite文件里 多个进程共用 下一次运行接着用
 """
 
 
 def main():
-    # 人对机器 还是 机器对机器
-    mode = "b v b"
-
     # 初始化 定义棋盘大小
     board_size = 3
-    # 生成对应大小的棋盘 使用类内的方法生成
-    game = goboard.GameState.new_game(board_size)
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    table_path = sys.argv[3] if len(sys.argv) > 3 else None
 
-    # 前端展示器类
-    exhibitor = Exhibitor(board_size, 50, mode)
     # 生成bot对象 可以接收一个棋盘作为输入 输出一个落子方案
-    bot_Cirno = Smart_Cirno()
+    bot_Cirno = Smart_Cirno(table_path=table_path)
     bot_naive = RandomBot()
 
-    winner = gotypes.Player.white
-
-    # 判断游戏是否结束 否则一直进行轮流落子
-    while winner != gotypes.Player.black:
-        game = goboard.GameState.new_game(board_size)
-        while not game.is_over():
-            move = None
-
-            # 判断这一步由谁下
-            if game.next_player == gotypes.Player.black:
-                if mode == "h v b" or mode == "h v h":
-                    # 若由黑棋下 则人类玩家决定这一步下在哪
-                    # 人类玩家输入落子点 数据结构是两个字符
-                    point = exhibitor.display(game, gotypes.Player.black)
-                    if point == "pass":
-                        move = Move(is_pass=True)
-                    else:
-                        move = Move.play(point)
-                elif mode == "b v b" or mode == "b v h":
-                    # 让机器人下这一步
-                    move = bot_naive.select_move(game)
-                    exhibitor.display(game, gotypes.Player.black)
-            else:
-                if mode == "b v b" or mode == "h v b":
-                    # 给bot棋盘 bot生成一个动作
-                    move, estimation = bot_Cirno.select_move(game)
-                    exhibitor.display(game, gotypes.Player.white)
-                elif mode == "b v h" or mode == "h v h":
-                    # 人类玩家输入落子点 数据结构是两个字符
-                    point = exhibitor.display(game, gotypes.Player.white)
-                    if point == "pass":
-                        move = Move(is_pass=True)
-                    else:
-                        move = Move.play(point)
-            # 打印 谁 下了哪步（或干了别的什么）
-            # print_move(game.next_player, move)
-            # 将move交给game 应用变化
-            game = game.apply_move(move)
-        winner = game.winner().get_winner
-        print(game.winner(), "win this game")
-    else:
-        print(game.board)
-        print("there is bug")
+    stats = SelfPlayStats()
+    for record in play_games(bot_naive, bot_Cirno, num_games, processes=processes, board_size=board_size,
+                             stop_when=lambda record: record.winner == gotypes.Player.black):
+        stats.add(record)
+        if record.winner == gotypes.Player.black:
+            print("there is bug, seed:", record.seed)
+    print(stats.summary())
 
 
 if __name__ == '__main__':
     main()
-# end::play_against_your_bot[]